@@ -0,0 +1,101 @@
+"""
+JWT-аутентификация без запроса пользователя к базе.
+Токен из TokenView несёт username, роль и флаги из User.TOKEN_FIELDS и
+версию прав User.token_version. Пользователь собирается из этих claims,
+остальные поля отложены и загружаются из базы при первом обращении.
+Смена прав увеличивает token_version в базе, в том числе через
+QuerySet.update(), а после фиксации — и в общем кэше версий (api.signals),
+так что токен со старой версией отклоняется в любом процессе. Если версии
+нет в кэше, она читается из базы. Токены без этих claims обрабатываются
+как раньше, с запросом к базе.
+"""
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .cache import version_cache
+
+VERSION_CLAIM = 'ver'
+TOKEN_VERSION_KEY = 'token_version:{}'
+# Версия удалённого пользователя: не совпадает ни с одной выданной.
+REVOKED = -1
+
+
+def store_token_version(user_id, version):
+    """Записывает в общий кэш версию прав из базы."""
+    version_cache().set(TOKEN_VERSION_KEY.format(user_id), version, None)
+
+
+def token_version(user_id):
+    """Текущая версия прав пользователя: из кэша, иначе из базы."""
+    cache = version_cache()
+    key = TOKEN_VERSION_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = get_user_model().objects.filter(pk=user_id).values_list(
+            'token_version', flat=True
+        ).first()
+        # add, а не set: более новая версия из сигнала не перезаписывается.
+        cache.add(key, REVOKED if version is None else version, None)
+        version = cache.get(key, version)
+    return version
+
+
+def full_user(user):
+    """Догружает одним запросом поля, отложенные у пользователя из токена."""
+    deferred = user.get_deferred_fields()
+    if deferred:
+        user.refresh_from_db(fields=deferred)
+    return user
+
+
+class ClaimsAccessToken(AccessToken):
+    """Access-токен с правами пользователя и их версией."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for field in user.TOKEN_FIELDS:
+            token[field] = getattr(user, field)
+        token[VERSION_CLAIM] = user.token_version
+        version_cache().add(TOKEN_VERSION_KEY.format(user.pk),
+                            user.token_version, None)
+        return token
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication, которая берёт пользователя из claims токена."""
+
+    def get_user(self, validated_token):
+        if VERSION_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+        if not validated_token.get('is_active'):
+            raise AuthenticationFailed('Пользователь неактивен.',
+                                       code='user_inactive')
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        if validated_token[VERSION_CLAIM] != token_version(user_id):
+            raise AuthenticationFailed(
+                'Права пользователя изменились, получите новый токен.',
+                code='token_revoked'
+            )
+        return self.token_user(validated_token)
+
+    def token_user(self, validated_token):
+        user_model = get_user_model()
+        values = {
+            field: validated_token[field]
+            for field in user_model.TOKEN_FIELDS
+        }
+        values[api_settings.USER_ID_FIELD] = validated_token[
+            api_settings.USER_ID_CLAIM
+        ]
+        field_names = [field.attname
+                       for field in user_model._meta.concrete_fields
+                       if field.attname in values]
+        return user_model.from_db(
+            DEFAULT_DB_ALIAS, field_names,
+            [values[name] for name in field_names]
+        )
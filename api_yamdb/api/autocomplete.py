@@ -0,0 +1,122 @@
+"""
+Индексы префиксов названий для автодополнения.
+Индекс строится при первом обращении и помнит свою версию из общего
+кэша, на которой построен. Каждое изменение после фиксации транзакции
+атомарно увеличивает эту версию на единицу. Процесс применяет своё
+изменение точечно, только если версия выросла ровно на единицу от той,
+что помнит индекс; иначе (изменения из другого процесса) индекс
+перестраивается при следующем поиске.
+"""
+import bisect
+import threading
+
+from reviews.models import Category, Genre, Title
+from .cache import get_versions, incr_version
+from .prometheus import cache_event
+
+
+class PrefixIndex:
+    """Отсортированные названия объектов одной модели."""
+
+    def __init__(self, model, extra_fields=()):
+        self.model = model
+        self.extra_fields = extra_fields
+        self.version_name = f'index:{model._meta.label_lower}'
+        self.lock = threading.Lock()
+        self.version = None
+        self.keys = []
+        self.ids = []
+        self.rows = {}
+
+    def row(self, values):
+        return dict(zip(('id', 'name', *self.extra_fields), values))
+
+    def instance_row(self, instance):
+        return self.row(
+            getattr(instance, field)
+            for field in ('pk', 'name', *self.extra_fields)
+        )
+
+    def rebuild(self, version):
+        rows = {
+            values[0]: self.row(values)
+            for values in self.model.objects.values_list(
+                'id', 'name', *self.extra_fields
+            ).iterator()
+        }
+        entries = sorted((row['name'].casefold(), pk)
+                         for pk, row in rows.items())
+        self.keys = [key for key, _ in entries]
+        self.ids = [pk for _, pk in entries]
+        self.rows = rows
+        self.version = version
+
+    def _remove(self, pk):
+        row = self.rows.pop(pk, None)
+        if row is None:
+            return
+        key = row['name'].casefold()
+        position = bisect.bisect_left(self.keys, key)
+        while self.ids[position] != pk:
+            position += 1
+        del self.keys[position]
+        del self.ids[position]
+
+    def _advance(self):
+        """
+        Увеличивает версию индекса; True, если до этого индекс был
+        актуален и изменение можно применить точечно.
+        """
+        version = incr_version(self.version_name)
+        current = self.version == version - 1
+        self.version = version if current else None
+        return current
+
+    def invalidate(self):
+        """Изменение без данных строки: индекс перестраивается везде."""
+        with self.lock:
+            incr_version(self.version_name)
+            self.version = None
+
+    def update(self, row):
+        with self.lock:
+            if not self._advance():
+                return
+            pk = row['id']
+            self._remove(pk)
+            key = row['name'].casefold()
+            position = bisect.bisect_right(self.keys, key)
+            self.keys.insert(position, key)
+            self.ids.insert(position, pk)
+            self.rows[pk] = row
+
+    def remove(self, pk):
+        with self.lock:
+            if self._advance():
+                self._remove(pk)
+
+    def search(self, prefix, limit):
+        key = prefix.casefold()
+        version = get_versions(self.version_name)[0]
+        with self.lock:
+            cache_event('autocomplete', version == self.version)
+            if version != self.version:
+                self.rebuild(version)
+            position = bisect.bisect_left(self.keys, key)
+            ids = self.ids[position:position + limit]
+            keys = self.keys[position:position + limit]
+            return [self.rows[pk] for pk, found in zip(ids, keys)
+                    if found.startswith(key)]
+
+
+INDEXES = {
+    'titles': PrefixIndex(Title),
+    'genres': PrefixIndex(Genre, ('slug',)),
+    'categories': PrefixIndex(Category, ('slug',)),
+}
+
+
+def autocomplete(prefix, limit, types=()):
+    """Подсказки по указанным индексам (по умолчанию — по всем)."""
+    return {name: INDEXES[name].search(prefix, limit)
+            for name in types or INDEXES}
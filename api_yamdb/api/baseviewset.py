@@ -1,9 +1,11 @@
 from rest_framework import viewsets, mixins, filters
 
 from .permissions import IsAdminOrReadOnly
+from .response_cache import ConditionalGetMixin
 
 
-class BaseCategoryGenreViewSet(mixins.ListModelMixin,
+class BaseCategoryGenreViewSet(ConditionalGetMixin,
+                               mixins.ListModelMixin,
                                mixins.CreateModelMixin,
                                mixins.DestroyModelMixin,
                                viewsets.GenericViewSet):
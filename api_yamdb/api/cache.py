@@ -0,0 +1,87 @@
+"""
+Версии моделей в кэше.
+Версия меняется при любом изменении строк модели и входит в ключи
+производных значений, поэтому устаревшие записи просто перестают читаться.
+Версии хранятся в кэше settings.VERSION_CACHE_ALIAS, общем для всех
+процессов, и меняются после фиксации транзакции (api.signals): иначе
+другой процесс продолжит читать записи со старой версией.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+VERSION_KEY = 'version:{}'
+# Версия имён пользователей: от неё зависят ответы с полем author.
+USERNAMES_VERSION = 'usernames'
+
+
+def version_cache():
+    return caches[settings.VERSION_CACHE_ALIAS]
+
+
+def version_key(model):
+    """Версия модели или именованная версия, например USERNAMES_VERSION."""
+    if isinstance(model, str):
+        return VERSION_KEY.format(model)
+    return VERSION_KEY.format(model._meta.label_lower)
+
+
+def object_version_key(model, pk):
+    """Версия одной строки модели, например конкретного произведения."""
+    return VERSION_KEY.format(f'{model._meta.label_lower}:{pk}')
+
+
+def get_versions_by_keys(keys):
+    """Текущие версии по ключам; отсутствующие в кэше заводятся заново."""
+    cache = version_cache()
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        for key in missing:
+            cache.add(key, time.time_ns(), None)
+        versions.update(cache.get_many(missing))
+    return tuple(versions[key] for key in keys)
+
+
+def get_versions(*models):
+    return get_versions_by_keys([version_key(model) for model in models])
+
+
+def bump_version(model):
+    version = time.time_ns()
+    version_cache().set(version_key(model), version, None)
+    return version
+
+
+def incr_version(name):
+    """
+    Атомарно увеличивает именованную версию на единицу и возвращает новое
+    значение: по нему видно, не менял ли её кто-то ещё. Атомарен incr
+    в Memcached и Redis; файловый кэш для разработки читает и пишет.
+    """
+    get_versions(name)
+    try:
+        return version_cache().incr(version_key(name))
+    except ValueError:
+        # Версия пропала между чтением и incr, например при сбросе.
+        return incr_version(name)
+
+
+def bump_object_version(model, pk):
+    version_cache().set(object_version_key(model, pk), time.time_ns(), None)
+
+
+def reset_versions():
+    """
+    Сбрасывает все версии во всех процессах. Для массовых изменений,
+    которые не отправляют сигналы: bulk_create, QuerySet.update().
+    """
+    version_cache().clear()
+
+
+def make_key(prefix, *parts):
+    """Ключ кэша из произвольных частей, сжатых в хэш."""
+    digest = hashlib.md5(repr(parts).encode()).hexdigest()
+    return f'{prefix}:{digest}'
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register()
+def check_version_cache(app_configs, **kwargs):
+    """Версии моделей должны быть общими для всех процессов."""
+    backend = settings.CACHES.get(
+        settings.VERSION_CACHE_ALIAS, {}
+    ).get('BACKEND')
+    if backend in LOCAL_CACHE_BACKENDS:
+        return [Error(
+            f'Кэш версий {settings.VERSION_CACHE_ALIAS!r} использует '
+            f'{backend}: другие процессы не увидят сброс версий и будут '
+            'отдавать устаревшие ответы.',
+            hint='Укажите в VERSION_CACHE_ALIAS общий кэш: файловый, '
+                 'Redis или Memcached.',
+            id='api.E001',
+        )]
+    return []
@@ -1,18 +1,75 @@
 import django_filters
+from rest_framework.filters import OrderingFilter, SearchFilter
 
-from reviews.models import Title
+from reviews.models import Category, Genre, Title
+from .search import search_titles
+
+
+def slug_ids(model, value):
+    """id объектов по списку слагов через запятую."""
+    slugs = [slug.strip() for slug in value.split(',') if slug.strip()]
+    return list(
+        model.objects.filter(slug__in=slugs).values_list('id', flat=True)
+    )
 
 
 class TitleFilter(django_filters.FilterSet):
-    """Фильтрация произведений по полям года, жанра и категории."""
+    """
+    Фильтрация произведений по полям года, жанра и категории.
+    Жанр и категория ищутся по точному слагу (можно несколько через
+    запятую), поиск по части слага — через genre__icontains
+    и category__icontains.
+    """
 
-    name = django_filters.CharFilter(field_name='name',
-                                     lookup_expr='icontains')
-    genre = django_filters.CharFilter(field_name='genre__slug',
-                                      lookup_expr='icontains')
-    category = django_filters.CharFilter(field_name='category__slug',
-                                         lookup_expr='icontains')
+    name = django_filters.CharFilter(method='filter_name')
+    genre = django_filters.CharFilter(method='filter_genre')
+    category = django_filters.CharFilter(method='filter_category')
+    genre__icontains = django_filters.CharFilter(
+        field_name='genre__slug', lookup_expr='icontains', distinct=True
+    )
+    category__icontains = django_filters.CharFilter(
+        field_name='category__slug', lookup_expr='icontains'
+    )
 
     class Meta:
         model = Title
         fields = ['year', 'name', 'genre', 'category']
+
+    def filter_name(self, queryset, name, value):
+        """Полнотекстовый поиск по началам слов в названии."""
+        return search_titles(queryset, value.split(), fields=('name',))
+
+    def filter_genre(self, queryset, name, value):
+        """
+        Произведения хотя бы с одним из жанров.
+        Подзапрос к промежуточной таблице не размножает строки,
+        поэтому distinct() не нужен.
+        """
+        genre_ids = slug_ids(Genre, value)
+        if not genre_ids:
+            return queryset.none()
+        return queryset.filter(id__in=Title.genre.through.objects.filter(
+            genre_id__in=genre_ids
+        ).values('title_id'))
+
+    def filter_category(self, queryset, name, value):
+        category_ids = slug_ids(Category, value)
+        if not category_ids:
+            return queryset.none()
+        return queryset.filter(category_id__in=category_ids)
+
+
+class TitleSearchFilter(SearchFilter):
+    """
+    Полнотекстовый поиск по названию и описанию произведений.
+    Без явного параметра ordering результаты сортируются по релевантности.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        queryset = search_titles(queryset, terms)
+        if OrderingFilter.ordering_param in request.query_params:
+            return queryset
+        return queryset.order_by('-search_rank', *queryset.query.order_by)
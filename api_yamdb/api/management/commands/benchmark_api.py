@@ -0,0 +1,280 @@
+import json
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+import uuid
+from collections import namedtuple
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext, override_settings, setup_databases,
+    setup_test_environment, teardown_databases, teardown_test_environment
+)
+from rest_framework_simplejwt.tokens import AccessToken
+
+from reviews.models import Category, Comment, Genre, Review, Title
+
+User = get_user_model()
+# Таблицы, в которые импортируется синтетический набор данных.
+DATA_MODELS = (Category, Genre, Title, User, Review, Comment)
+
+# method, путь, тело, заголовки и ожидаемый код ответа.
+Call = namedtuple('Call', 'method path data headers status')
+
+PERCENTILES = (50, 90, 95, 99)
+LOCMEM_EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+DUMMY_CACHE_BACKEND = 'django.core.cache.backends.dummy.DummyCache'
+
+
+def percentile(values, share):
+    """Перцентиль по ближайшему рангу; values отсортированы."""
+    rank = max(1, -(-len(values) * share // 100))
+    return values[int(rank) - 1]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ('git', 'rev-parse', '--short', 'HEAD'), cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет задержки, число SQL-запросов и пропускную способность '
+        'основных эндпоинтов API через тестовый клиент Django. '
+        'Данные генерируются generate_data в тестовой базе, отчёт '
+        'сохраняется в JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=1000)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--reviews', type=int, default=20_000)
+        parser.add_argument('--comments', type=int, default=40_000)
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Число замеряемых запросов на эндпоинт.')
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', default='benchmark.json',
+                            help='Файл JSON-отчёта.')
+        parser.add_argument('--compare',
+                            help='Предыдущий отчёт для сравнения.')
+        parser.add_argument(
+            '--response-cache', action='store_true',
+            help=('Не отключать кэш ответов. Без этого флага замеряется '
+                  'путь через базу и сериализаторы: повторные GET-запросы '
+                  'иначе почти всегда попадают в кэш.')
+        )
+        parser.add_argument(
+            '--no-test-db', action='store_true',
+            help=('Не создавать тестовую базу, а работать с текущей. '
+                  'Допускается только пустая база: в неё импортируется '
+                  'синтетический набор данных, и он вместе с созданными '
+                  'при замерах записями останется в ней.')
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] + options['warmup'] > options['titles']:
+            # Пользователь бенчмарка оставляет по отзыву на произведение.
+            raise CommandError(
+                '--requests и --warmup вместе не могут превышать --titles.')
+        if options['reviews'] < 1:
+            raise CommandError('--reviews должно быть больше нуля.')
+        previous = None
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as file:
+                previous = json.load(file)
+        if options['no_test_db']:
+            if any(model.objects.exists() for model in DATA_MODELS):
+                raise CommandError(
+                    '--no-test-db допускается только для пустой базы: '
+                    'в неё импортируется синтетический набор данных.')
+            with override_settings(EMAIL_BACKEND=LOCMEM_EMAIL_BACKEND):
+                report = self.run(options)
+        else:
+            # Подменяет отправку почты на locmem и разрешает testserver.
+            setup_test_environment()
+            old_config = setup_databases(verbosity=0, interactive=False)
+            try:
+                report = self.run(options)
+            finally:
+                teardown_databases(old_config, verbosity=0)
+                teardown_test_environment()
+        with open(options['output'], 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        self.print_report(report, previous)
+        self.stdout.write(f'Отчёт сохранён в {options["output"]}.')
+
+    def run(self, options):
+        if options['response_cache']:
+            return self.run_measurements(options)
+        caches = {**settings.CACHES,
+                  'benchmark': {'BACKEND': DUMMY_CACHE_BACKEND}}
+        with override_settings(CACHES=caches,
+                               RESPONSE_CACHE_ALIAS='benchmark'):
+            return self.run_measurements(options)
+
+    def run_measurements(self, options):
+        self.rng = random.Random(options['seed'])
+        started = time.perf_counter()
+        self.seed(options)
+        seeded = time.perf_counter() - started
+        endpoints = {}
+        for name, calls in self.scenarios(options):
+            endpoints[name] = self.measure(name, calls, options)
+        return {
+            'created': datetime.now(timezone.utc).isoformat(),
+            'commit': git_commit(),
+            'database': connection.vendor,
+            'dataset': {
+                name: options[name]
+                for name in ('titles', 'users', 'reviews', 'comments')
+            },
+            'seed': options['seed'],
+            'seed_seconds': round(seeded, 2),
+            'requests': options['requests'],
+            'response_cache': options['response_cache'],
+            'endpoints': endpoints,
+        }
+
+    def seed(self, options):
+        sizes = {name: options[name]
+                 for name in ('titles', 'users', 'reviews', 'comments')}
+        with tempfile.TemporaryDirectory() as path:
+            call_command('generate_data', path=path, seed=options['seed'],
+                         stdout=StringIO(), **sizes)
+            call_command('import_all', path=path, stdout=StringIO())
+
+    def scenarios(self, options):
+        """
+        Пары (эндпоинт, запросы). Запросы создаются лениво: сценарии
+        signup и token зависят от результатов предыдущих.
+        """
+        total = options['requests'] + options['warmup']
+        title_ids = list(Title.objects.values_list('id', flat=True))
+        # Имена уникальны для каждого запуска, чтобы повторный запуск
+        # на той же базе не упирался в уже созданных пользователей.
+        prefix = f'benchmark_{uuid.uuid4().hex[:8]}'
+        author = User.objects.create(username=prefix,
+                                     email=f'{prefix}@yamdb.fake')
+        auth = {
+            'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(author)}'
+        }
+        last_review = Review.objects.order_by('-id').first()
+        review_ids = self.rng.sample(range(1, last_review.id + 1),
+                                     min(total, last_review.id))
+        pairs = list(Review.objects.filter(id__in=review_ids)
+                     .values_list('title_id', 'id'))
+        pages = max(1, min(10, len(title_ids) // settings.REST_FRAMEWORK[
+            'PAGE_SIZE']))
+
+        yield 'titles-list', (
+            Call('get', f'/api/v1/titles/?page={self.rng.randint(1, pages)}',
+                 None, {}, 200)
+            for _ in range(total)
+        )
+        yield 'titles-retrieve', (
+            Call('get', f'/api/v1/titles/{self.rng.choice(title_ids)}/',
+                 None, {}, 200)
+            for _ in range(total)
+        )
+        yield 'reviews-list', (
+            Call('get',
+                 f'/api/v1/titles/{self.rng.choice(title_ids)}/reviews/',
+                 None, {}, 200)
+            for _ in range(total)
+        )
+        yield 'comments-list', (
+            Call('get', '/api/v1/titles/{}/reviews/{}/comments/'.format(
+                *self.rng.choice(pairs)), None, {}, 200)
+            for _ in range(total)
+        )
+        create_ids = self.rng.sample(title_ids, min(total, len(title_ids)))
+        yield 'reviews-create', (
+            Call('post', f'/api/v1/titles/{title_id}/reviews/',
+                 {'text': 'Отзыв из бенчмарка', 'score': 7}, auth, 201)
+            for title_id in create_ids
+        )
+        usernames = [f'{prefix}_{number}' for number in range(total)]
+        yield 'signup', (
+            Call('post', '/api/v1/auth/signup/',
+                 {'username': username, 'email': f'{username}@yamdb.fake'},
+                 {}, 200)
+            for username in usernames
+        )
+        yield 'token', (
+            Call('post', '/api/v1/auth/token/', {
+                'username': user.username,
+                'confirmation_code': default_token_generator.make_token(user),
+            }, {}, 200)
+            for user in User.objects.filter(username__in=usernames)
+        )
+
+    def measure(self, name, calls, options):
+        client = Client()
+        timings, queries, errors, hits = [], [], 0, 0
+        wall = 0.0
+        for number, call in enumerate(calls):
+            request = getattr(client, call.method)
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = request(call.path, call.data,
+                                   content_type='application/json',
+                                   **call.headers)
+                elapsed = time.perf_counter() - started
+            if response.status_code != call.status:
+                errors += 1
+            if number < options['warmup']:
+                continue
+            hits += response.get('X-Cache') == 'HIT'
+            wall += elapsed
+            timings.append(elapsed * 1000)
+            queries.append(len(captured))
+        if not timings:
+            raise CommandError(f'{name}: нет данных для замеров.')
+        timings.sort()
+        result = {
+            'count': len(timings),
+            'errors': errors,
+            'cache_hits': hits,
+            'mean_ms': round(statistics.mean(timings), 3),
+            'max_ms': round(timings[-1], 3),
+            'queries_mean': round(statistics.mean(queries), 2),
+            'queries_max': max(queries),
+            'rps': round(len(timings) / wall, 1),
+        }
+        for share in PERCENTILES:
+            result[f'p{share}_ms'] = round(percentile(timings, share), 3)
+        return result
+
+    def print_report(self, report, previous=None):
+        self.stdout.write(
+            f'{"эндпоинт":<16}{"p50, мс":>10}{"p95, мс":>10}{"p99, мс":>10}'
+            f'{"запросов":>10}{"RPS":>9}{"ошибки":>8}'
+        )
+        for name, result in report['endpoints'].items():
+            line = (
+                f'{name:<16}{result["p50_ms"]:>10.2f}{result["p95_ms"]:>10.2f}'
+                f'{result["p99_ms"]:>10.2f}{result["queries_mean"]:>10.1f}'
+                f'{result["rps"]:>9.0f}{result["errors"]:>8}'
+            )
+            before = (previous or {}).get('endpoints', {}).get(name)
+            if before:
+                change = (result['p50_ms'] / before['p50_ms'] - 1) * 100
+                line += (f'  p50 {change:+.0f}% к {previous["commit"]}, '
+                         f'запросов было {before["queries_mean"]:.1f}')
+            self.stdout.write(line)
@@ -0,0 +1,96 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from api.search import search_titles
+from reviews.models import Category, Title
+
+SYLLABLES = ('ка', 'ло', 'ми', 'ра', 'ту', 'не', 'зо', 'ви', 'ше', 'да',
+             'ру', 'ле', 'по', 'со', 'ны', 'бе')
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает поиск icontains и полнотекстовый поиск на синтетических '
+        'произведениях. Данные создаются в транзакции и откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=100_000)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        vocabulary = sorted({
+            ''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4)))
+            for _ in range(5000)
+        })
+        rng.shuffle(vocabulary)
+        weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+        queries = {
+            'частое слово': [vocabulary[0]],
+            'редкое слово': [vocabulary[-1]],
+            'два слова': [vocabulary[1], vocabulary[5]],
+        }
+        with transaction.atomic():
+            started = time.perf_counter()
+            self.fill(rng, vocabulary, weights, options)
+            self.stdout.write(
+                f'Создано {options["titles"]} произведений за '
+                f'{time.perf_counter() - started:.1f} с.'
+            )
+            for label, terms in queries.items():
+                for method, queryset in (
+                    ('icontains', self.icontains(terms)),
+                    ('fulltext', search_titles(Title.objects.all(), terms)
+                     .order_by('-search_rank', 'name')),
+                ):
+                    self.report(label, method, queryset, options['repeat'])
+            transaction.set_rollback(True)
+
+    def fill(self, rng, vocabulary, weights, options):
+        category = Category.objects.create(
+            name='Бенчмарк', slug=f'benchmark-{rng.randrange(10 ** 9)}'
+        )
+        batch = []
+        for idx in range(options['titles']):
+            words = rng.choices(vocabulary, weights, k=13)
+            batch.append(Title(
+                name=f'{" ".join(words[:3])} {idx}',
+                description=' '.join(words[3:]),
+                year=rng.randint(1900, 2020),
+                category=category,
+            ))
+            if len(batch) == options['batch_size']:
+                Title.objects.bulk_create(batch)
+                batch = []
+        Title.objects.bulk_create(batch)
+
+    def icontains(self, terms):
+        condition = Q()
+        for term in terms:
+            condition &= (Q(name__icontains=term)
+                          | Q(description__icontains=term))
+        return Title.objects.filter(condition).order_by('name')
+
+    def report(self, label, method, queryset, repeat):
+        """Время первой страницы вместе с COUNT, как в списке API."""
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            count = queryset.count()
+            list(queryset[:10])
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+        self.stdout.write(
+            f'{label:<14} {method:<10} найдено {count:>8}  '
+            f'медиана {statistics.median(timings):8.2f} мс  '
+            f'p95 {p95:8.2f} мс'
+        )
@@ -0,0 +1,142 @@
+"""
+Метрики запросов в памяти процесса.
+PerformanceMiddleware заводит RequestMetrics на каждый запрос, по его
+завершении данные попадают в registry с разбивкой по представлениям.
+"""
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from functools import wraps
+
+from rest_framework import serializers
+
+# Сколько последних длительностей хранится для перцентилей.
+SAMPLE_SIZE = 1000
+
+current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Счётчики одного запроса."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self.serializer_depth = 0
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        """Обёртка для connection.execute_wrapper."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - started
+            self.queries += 1
+
+
+def percentile(values, share):
+    """Перцентиль по ближайшему рангу; values отсортированы."""
+    rank = max(1, -(-len(values) * share // 100))
+    return values[int(rank) - 1]
+
+
+class ViewStats:
+    """Накопленные метрики одного представления."""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.wall_seconds = 0.0
+        self.wall_max = 0.0
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self.bytes = 0
+        self.samples = deque(maxlen=SAMPLE_SIZE)
+
+    def add(self, status, wall, metrics, size):
+        self.count += 1
+        self.errors += status >= 500
+        self.wall_seconds += wall
+        self.wall_max = max(self.wall_max, wall)
+        self.queries += metrics.queries
+        self.db_seconds += metrics.db_seconds
+        self.serializer_seconds += metrics.serializer_seconds
+        self.bytes += size
+        self.samples.append(wall)
+
+    def as_dict(self):
+        samples = sorted(self.samples)
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'mean_ms': round(self.wall_seconds / self.count * 1000, 3),
+            'p50_ms': round(percentile(samples, 50) * 1000, 3),
+            'p95_ms': round(percentile(samples, 95) * 1000, 3),
+            'max_ms': round(self.wall_max * 1000, 3),
+            'queries_mean': round(self.queries / self.count, 2),
+            'db_mean_ms': round(self.db_seconds / self.count * 1000, 3),
+            'serializer_mean_ms': round(
+                self.serializer_seconds / self.count * 1000, 3),
+            'bytes_mean': round(self.bytes / self.count),
+        }
+
+
+class Registry:
+    """Метрики по представлениям; общие для потоков процесса."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+
+    def record(self, view, status, wall, metrics, size):
+        with self.lock:
+            if view not in self.views:
+                self.views[view] = ViewStats()
+            self.views[view].add(status, wall, metrics, size)
+
+    def snapshot(self):
+        with self.lock:
+            return {view: stats.as_dict()
+                    for view, stats in sorted(self.views.items())}
+
+    def reset(self):
+        with self.lock:
+            self.views = {}
+
+
+registry = Registry()
+
+
+def timed(data):
+    """
+    Время свойства data сериализатора. Вложенные вызовы (например,
+    to_representation через другой сериализатор) не считаются повторно.
+    """
+
+    @wraps(data)
+    def wrapper(serializer):
+        metrics = current.get()
+        if metrics is None:
+            return data(serializer)
+        metrics.serializer_depth += 1
+        started = time.perf_counter()
+        try:
+            return data(serializer)
+        finally:
+            metrics.serializer_depth -= 1
+            if not metrics.serializer_depth:
+                metrics.serializer_seconds += time.perf_counter() - started
+
+    return wrapper
+
+
+def instrument_serializers():
+    """Подменяет BaseSerializer.data на версию с замером времени."""
+    data = serializers.BaseSerializer.data
+    if not getattr(data.fget, 'timed', False):
+        wrapper = timed(data.fget)
+        wrapper.timed = True
+        serializers.BaseSerializer.data = property(wrapper)
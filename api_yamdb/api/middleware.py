@@ -0,0 +1,110 @@
+import os
+import re
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from api import prometheus
+from api.metrics import RequestMetrics, current, registry
+from api.permissions import IsAdmin
+from api.profiling import PROFILERS, run_profiled
+
+
+def view_name(request):
+    """Имя представления вида TitleViewSet.list или TokenView.post."""
+    match = request.resolver_match
+    if match is None:
+        return 'unresolved'
+    view_class = getattr(match.func, 'cls', None)
+    if view_class is None:
+        return match.view_name
+    method = request.method.lower()
+    actions = getattr(match.func, 'actions', None) or {}
+    return f'{view_class.__name__}.{actions.get(method, method)}'
+
+
+def route_name(request):
+    """Имя маршрута из urls.py, например title-list."""
+    match = request.resolver_match
+    if match is None:
+        return 'unresolved'
+    return match.url_name or match.view_name
+
+
+class PerformanceMiddleware:
+    """
+    Замеряет время запроса, число и время SQL-запросов, время
+    сериализаторов и размер ответа. Отдаёт их в заголовке
+    Server-Timing, копит по представлениям в api.metrics.registry
+    и по маршрутам в api.prometheus.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = current.set(metrics)
+        prometheus.add_gauge('yamdb_http_requests_in_flight', {}, 1)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(metrics.db_wrapper))
+                response = self.get_response(request)
+        finally:
+            current.reset(token)
+            prometheus.add_gauge('yamdb_http_requests_in_flight', {}, -1)
+        wall = time.perf_counter() - started
+        size = 0 if response.streaming else len(response.content)
+        response['Server-Timing'] = (
+            f'total;dur={wall * 1000:.2f}, '
+            f'db;dur={metrics.db_seconds * 1000:.2f};'
+            f'desc="{metrics.queries} queries", '
+            f'serializer;dur={metrics.serializer_seconds * 1000:.2f}'
+        )
+        registry.record(view_name(request), response.status_code, wall,
+                        metrics, size)
+        prometheus.observe_request(route_name(request), request.method,
+                                   response.status_code, wall, metrics, size)
+        prometheus.flush()
+        return response
+
+
+def is_admin(request):
+    """Проверка IsAdmin с аутентификацией DRF до вызова представления."""
+    drf_request = Request(request, authenticators=[
+        authenticator()
+        for authenticator in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    ])
+    try:
+        return IsAdmin().has_permission(drf_request, None)
+    except APIException:
+        return False
+
+
+class ProfilingMiddleware:
+    """
+    Профилирует запрос администратора с заголовком X-Profile или
+    параметром profile (cprofile или sample). Профиль сохраняется
+    в settings.PROFILE_DIR, имя файла возвращается в X-Profile.
+    Запросы остальных пользователей выполняются как обычно.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        kind = request.headers.get('X-Profile') or request.GET.get('profile')
+        if kind not in PROFILERS or not is_admin(request):
+            return self.get_response(request)
+        label = re.sub(r'[^\w-]+', '_', request.path).strip('_')[:60]
+        response, path = run_profiled(kind, label, self.get_response,
+                                      request)
+        response['X-Profile'] = os.path.basename(path)
+        return response
@@ -0,0 +1,209 @@
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import (
+    CursorPagination, PageNumberPagination, _reverse_ordering
+)
+
+from .cache import get_versions, make_key
+from .prometheus import cache_event
+
+
+class CachedCountPaginator(Paginator):
+    """Пагинатор, берущий общее количество объектов из кэша."""
+
+    def __init__(self, object_list, per_page, count_key=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_key = count_key
+
+    @cached_property
+    def count(self):
+        if self.count_key is None:
+            return super().count
+        count = cache.get(self.count_key)
+        cache_event('count', count is not None)
+        if count is None:
+            count = self.object_list.order_by().count()
+            cache.set(self.count_key, count, settings.COUNT_CACHE_TIMEOUT)
+        return count
+
+
+class CachedCountPagination(PageNumberPagination):
+    """
+    Постраничная пагинация с кэшированием COUNT.
+    Ключ учитывает вьюсет, параметры запроса и версии моделей из
+    count_dependencies вьюсета (по умолчанию — модель queryset).
+    """
+
+    count_key = None
+
+    def django_paginator_class(self, queryset, page_size):
+        return CachedCountPaginator(queryset, page_size,
+                                    count_key=self.count_key)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_key = self.get_count_key(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_count_key(self, queryset, request, view):
+        if view is None:
+            return None
+        params = sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            if key != self.page_query_param
+            for value in values
+        )
+        dependencies = getattr(view, 'count_dependencies', (queryset.model,))
+        return make_key(
+            'count', type(view).__name__, sorted(view.kwargs.items()),
+            params, get_versions(*dependencies)
+        )
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Курсорная пагинация по сортировке вьюсета.
+    Для стабильного порядка при совпадениях добавляется сортировка по id.
+    Позиция курсора хранит значения всех полей сортировки, и следующая
+    страница выбирается условием (field > v) OR (field = v AND id > id),
+    а не смещением среди записей с одинаковым значением первого поля.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        if any(issubclass(backend, OrderingFilter)
+               for backend in getattr(view, 'filter_backends', ())):
+            ordering = super().get_ordering(request, queryset, view)
+        else:
+            ordering = queryset.model._meta.ordering
+        ordering = tuple(ordering)
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            ordering += ('-id' if ordering[0].startswith('-') else 'id',)
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # Повторяет CursorPagination.paginate_queryset, но фильтрует
+        # по всем полям сортировки сразу.
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            queryset = queryset.filter(
+                self.keyset_filter(queryset.model, current_position, reverse)
+            )
+
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = list(results[:self.page_size])
+
+        following_position = None
+        if len(results) > len(self.page):
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering
+            )
+        if reverse:
+            self.page.reverse()
+        self.set_links(reverse, offset, current_position, following_position)
+
+        if (self.has_previous or self.has_next) and (
+                self.template is not None):
+            self.display_page_controls = True
+
+        return self.page
+
+    def set_links(self, reverse, offset, current_position,
+                  following_position):
+        """Позиции соседних страниц, как в CursorPagination."""
+        has_current = current_position is not None or offset > 0
+        has_following = following_position is not None
+        if reverse:
+            self.has_next, self.has_previous = has_current, has_following
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next, self.has_previous = has_following, has_current
+            self.next_position = following_position
+            self.previous_position = current_position
+
+    def keyset_filter(self, model, position, reverse):
+        """Условие «после позиции» для составного ключа сортировки."""
+        try:
+            values = json.loads(position)
+        except ValueError:
+            values = None
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        condition, equal = Q(), {}
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            try:
+                value = model._meta.get_field(name).to_python(value)
+            except (ValueError, TypeError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+            lookup = '__lt' if field.startswith('-') != reverse else '__gt'
+            condition |= Q(**equal, **{name + lookup: value})
+            equal[name] = value
+        return condition
+
+    def _get_position_from_instance(self, instance, ordering):
+        return json.dumps(
+            [getattr(instance, field.lstrip('-')) for field in ordering],
+            # str, а не DjangoJSONEncoder: он обрезает микросекунды.
+            default=str
+        )
+
+
+class OptionalCursorPagination(CachedCountPagination):
+    """
+    Постраничная пагинация, переходящая на курсорную,
+    если в запросе передан параметр cursor (в том числе пустой).
+    """
+
+    cursor_pagination_class = KeysetPagination
+
+    def __init__(self):
+        self.cursor_paginator = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        cursor_param = self.cursor_pagination_class.cursor_query_param
+        if cursor_param not in request.query_params:
+            return super().paginate_queryset(queryset, request, view)
+        self.cursor_paginator = self.cursor_pagination_class()
+        page = self.cursor_paginator.paginate_queryset(
+            queryset, request, view
+        )
+        self.display_page_controls = (
+            self.cursor_paginator.display_page_controls
+        )
+        return page
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def to_html(self):
+        if self.cursor_paginator:
+            return self.cursor_paginator.to_html()
+        return super().to_html()
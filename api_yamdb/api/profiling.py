@@ -0,0 +1,93 @@
+"""
+Профилирование отдельных запросов.
+cProfile сохраняет результат в формате pstats (.prof), семплирующий
+профилировщик — в свёрнутых стеках (.collapsed) для flamegraph.pl
+и speedscope.
+"""
+import cProfile
+import os
+import sys
+import threading
+import uuid
+from collections import Counter
+from datetime import datetime
+
+from django.conf import settings
+
+PROFILERS = ('cprofile', 'sample')
+
+
+class Sampler:
+    """Снимает стек указанного потока через равные промежутки."""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({code.co_filename}:'
+                             f'{code.co_firstlineno})')
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+
+    def collapsed(self):
+        return ''.join(f'{stack} {count}\n'
+                       for stack, count in self.stacks.most_common())
+
+
+def profile_path(label, extension):
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    # Имена начинаются со времени до микросекунд и сортируются по нему.
+    name = (f'{datetime.now().strftime("%Y%m%d-%H%M%S-%f")}-{label}-'
+            f'{uuid.uuid4().hex[:8]}.{extension}')
+    return os.path.join(settings.PROFILE_DIR, name)
+
+
+def prune_profiles():
+    """Удаляет старые профили сверх settings.PROFILE_MAX_FILES."""
+    profiles = sorted(
+        (name for name in os.listdir(settings.PROFILE_DIR)
+         if name.endswith(('.prof', '.collapsed'))),
+        reverse=True
+    )
+    for name in profiles[settings.PROFILE_MAX_FILES:]:
+        try:
+            os.remove(os.path.join(settings.PROFILE_DIR, name))
+        except FileNotFoundError:
+            # Его уже удалил другой запрос.
+            pass
+
+
+def run_profiled(kind, label, function, *args):
+    """Выполняет function(*args) под профилировщиком kind."""
+    if kind == 'cprofile':
+        profiler = cProfile.Profile()
+        result = profiler.runcall(function, *args)
+        path = profile_path(label, 'prof')
+        profiler.dump_stats(path)
+    else:
+        with Sampler(threading.get_ident(),
+                     settings.PROFILE_SAMPLE_INTERVAL) as sampler:
+            result = function(*args)
+        path = profile_path(label, 'collapsed')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(sampler.collapsed())
+    prune_profiles()
+    return result, path
@@ -0,0 +1,360 @@
+"""
+Метрики в текстовом формате Prometheus.
+Значения копятся в словарях отдельных потоков, поэтому запись не
+требует блокировок; при чтении словари суммируются, а словари
+завершившихся потоков сливаются в один. Если задан settings.METRICS_DIR,
+каждый процесс периодически сохраняет свои значения в файл <pid>.json,
+и /metrics суммирует файлы всех воркеров. Счётчики завершившегося
+воркера забирает себе процесс, первым заметивший его файл.
+"""
+import json
+import math
+import os
+import threading
+import time
+import weakref
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5,
+                    10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Имя семейства: (тип, описание).
+FAMILIES = {
+    'yamdb_http_requests_total': (
+        'counter', 'Число запросов по маршруту, методу и коду ответа.'),
+    'yamdb_http_request_duration_seconds': (
+        'histogram', 'Время обработки запроса.'),
+    'yamdb_http_request_db_queries': (
+        'histogram', 'Число SQL-запросов на запрос.'),
+    'yamdb_http_request_db_seconds': (
+        'histogram', 'Время SQL-запросов на запрос.'),
+    'yamdb_http_response_bytes_total': (
+        'counter', 'Объём ответов.'),
+    'yamdb_cache_requests_total': (
+        'counter', 'Обращения к кэшам: result="hit" или "miss".'),
+    'yamdb_cache_hit_ratio': (
+        'gauge', 'Доля попаданий в кэш с запуска.'),
+    'yamdb_http_requests_in_flight': (
+        'gauge', 'Запросы, обрабатываемые в данный момент.'),
+    'yamdb_db_connections_open': (
+        'gauge', 'Открытые соединения с базой данных.'),
+}
+
+
+class Shard:
+    """Значения одного потока: (имя, метки) -> число."""
+
+    def __init__(self):
+        self.counters = defaultdict(float)
+        self.gauges = defaultdict(float)
+
+    def merge(self, other):
+        # Копия: поток может добавить ключ во время обхода.
+        for key, value in other.counters.copy().items():
+            self.counters[key] += value
+        for key, value in other.gauges.copy().items():
+            self.gauges[key] += value
+
+
+_local = threading.local()
+# Поток -> его значения; значения завершившихся потоков и воркеров
+# копятся в _retired.
+_shards = {}
+_retired = Shard()
+_shards_lock = threading.Lock()
+_flush_lock = threading.Lock()
+_last_flush = 0.0
+_histogram_keys = {}
+_connections = weakref.WeakSet()
+_connections_lock = threading.Lock()
+
+
+def shard():
+    try:
+        return _local.shard
+    except AttributeError:
+        _local.shard = Shard()
+        # Блокировка берётся один раз на поток.
+        with _shards_lock:
+            _shards[threading.current_thread()] = _local.shard
+        return _local.shard
+
+
+def labels_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def inc(name, labels, value=1):
+    shard().counters[name, labels_key(labels)] += value
+
+
+def add_gauge(name, labels, value):
+    shard().gauges[name, labels_key(labels)] += value
+
+
+def histogram_keys(name, labels, buckets):
+    """Ключи корзин, суммы и количества; строятся один раз на метки."""
+    cache_key = name, labels
+    keys = _histogram_keys.get(cache_key)
+    if keys is None:
+        labels = dict(labels)
+        keys = _histogram_keys[cache_key] = (
+            [(f'{name}_bucket', labels_key({**labels, 'le': str(bound)}))
+             for bound in buckets],
+            (f'{name}_bucket', labels_key({**labels, 'le': '+Inf'})),
+            (f'{name}_sum', labels_key(labels)),
+            (f'{name}_count', labels_key(labels)),
+        )
+    return keys
+
+
+def observe(name, labels, value, buckets):
+    counters = shard().counters
+    bucket_keys, infinity, total, count = histogram_keys(name, labels,
+                                                         buckets)
+    # Пустые корзины тоже заводятся: гистограмме нужны все границы.
+    for bound, key in zip(buckets, bucket_keys):
+        counters[key] += value <= bound
+    counters[infinity] += 1
+    counters[total] += value
+    counters[count] += 1
+
+
+def cache_event(name, hit):
+    """Учёт обращения к кэшу name."""
+    inc('yamdb_cache_requests_total',
+        {'cache': name, 'result': 'hit' if hit else 'miss'})
+
+
+def observe_request(route, method, status, wall, metrics, size):
+    labels = (('method', method), ('route', route))
+    counters = shard().counters
+    counters['yamdb_http_requests_total',
+             labels + (('status', str(status)),)] += 1
+    counters['yamdb_http_response_bytes_total', labels] += size
+    observe('yamdb_http_request_duration_seconds', labels, wall,
+            DURATION_BUCKETS)
+    observe('yamdb_http_request_db_queries', labels, metrics.queries,
+            QUERY_BUCKETS)
+    observe('yamdb_http_request_db_seconds', labels, metrics.db_seconds,
+            DURATION_BUCKETS)
+
+
+@receiver(connection_created)
+def track_connection(sender, connection, **kwargs):
+    with _connections_lock:
+        _connections.add(connection)
+
+
+def open_connections():
+    """Открытые соединения всех потоков процесса по алиасам баз."""
+    with _connections_lock:
+        wrappers = list(_connections)
+    counts = defaultdict(float)
+    for wrapper in wrappers:
+        if wrapper.connection is not None:
+            counts[wrapper.alias] += 1
+    return {('yamdb_db_connections_open', (('alias', alias),)): count
+            for alias, count in counts.items()}
+
+
+def retire_threads():
+    """Сливает значения завершившихся потоков, чтобы они не копились."""
+    with _shards_lock:
+        for thread in [thread for thread in _shards
+                       if not thread.is_alive()]:
+            _retired.merge(_shards.pop(thread))
+        return [_retired, *_shards.values()]
+
+
+def local_values():
+    """Суммы по потокам текущего процесса."""
+    total = Shard()
+    for item in retire_threads():
+        total.merge(item)
+    total.gauges.update(open_connections())
+    return total.counters, total.gauges
+
+
+def metrics_dir():
+    return getattr(settings, 'METRICS_DIR', None)
+
+
+def flush(force=False):
+    """Сохраняет значения процесса не чаще METRICS_FLUSH_INTERVAL."""
+    global _last_flush
+    path = metrics_dir()
+    if not path:
+        return
+    now = time.monotonic()
+    if not force and now - _last_flush < settings.METRICS_FLUSH_INTERVAL:
+        return
+    if not _flush_lock.acquire(blocking=False):
+        return
+    try:
+        _last_flush = now
+        counters, gauges = local_values()
+        state = {
+            'counters': [[name, labels, value]
+                         for (name, labels), value in counters.items()],
+            'gauges': [[name, labels, value]
+                       for (name, labels), value in gauges.items()],
+        }
+        os.makedirs(path, exist_ok=True)
+        file_path = os.path.join(path, f'{os.getpid()}.json')
+        temporary = f'{file_path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as file:
+            json.dump(state, file)
+        os.replace(temporary, file_path)
+    finally:
+        _flush_lock.release()
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def read_state(file_path):
+    with open(file_path, encoding='utf-8') as file:
+        state = json.load(file)
+    return {
+        kind: [((name, tuple(map(tuple, labels))), value)
+               for name, labels, value in state[kind]]
+        for kind in ('counters', 'gauges')
+    }
+
+
+def adopt_worker(path, file_name):
+    """
+    Забирает счётчики завершившегося воркера в _retired и удаляет его
+    файл; датчики отбрасываются. Переименование гарантирует, что файл
+    заберёт только один процесс.
+    """
+    claimed = os.path.join(path, f'{file_name}.{os.getpid()}.adopted')
+    try:
+        os.rename(os.path.join(path, file_name), claimed)
+    except OSError:
+        return
+    try:
+        state = read_state(claimed)
+    except (OSError, ValueError):
+        state = {'counters': []}
+    with _shards_lock:
+        for key, value in state['counters']:
+            _retired.counters[key] += value
+    flush(force=True)
+    os.remove(claimed)
+
+
+def read_workers(path, counters, gauges):
+    """Добавляет значения других процессов из файлов в path."""
+    own = f'{os.getpid()}.json'
+    for file_name in os.listdir(path):
+        if not file_name.endswith('.json') or file_name == own:
+            continue
+        if not pid_alive(int(file_name[:-len('.json')])):
+            adopt_worker(path, file_name)
+            continue
+        try:
+            state = read_state(os.path.join(path, file_name))
+        except (OSError, ValueError):
+            continue
+        for key, value in state['counters']:
+            counters[key] += value
+        for key, value in state['gauges']:
+            gauges[key] += value
+
+
+def hit_ratios(counters):
+    requests = defaultdict(lambda: {'hit': 0, 'miss': 0})
+    for (name, labels), value in counters.items():
+        if name == 'yamdb_cache_requests_total':
+            labels = dict(labels)
+            requests[labels['cache']][labels['result']] += value
+    return {
+        ('yamdb_cache_hit_ratio', (('cache', cache_name),)):
+            results['hit'] / (results['hit'] + results['miss'])
+        for cache_name, results in requests.items()
+    }
+
+
+def collect():
+    """
+    Значения всех процессов. Счётчики завершившихся воркеров
+    сохраняются, их датчики не учитываются.
+    """
+    counters, gauges = defaultdict(float), defaultdict(float)
+    path = metrics_dir()
+    if path and os.path.isdir(path):
+        # До local_values: счётчики завершившихся воркеров переходят
+        # в значения этого процесса.
+        read_workers(path, counters, gauges)
+    own_counters, own_gauges = local_values()
+    for key, value in own_counters.items():
+        counters[key] += value
+    for key, value in own_gauges.items():
+        gauges[key] += value
+    gauges.update(hit_ratios(counters))
+    return counters, gauges
+
+
+def family(name):
+    for suffix in ('_bucket', '_sum', '_count'):
+        if name.endswith(suffix) and name[:-len(suffix)] in FAMILIES:
+            return name[:-len(suffix)]
+    return name
+
+
+def format_value(value):
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(int(value)) if value == int(value) else repr(value)
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(key, str(value).replace('\\', r'\\')
+                         .replace('"', r'\"').replace('\n', r'\n'))
+        for key, value in labels
+    )
+    return f'{{{pairs}}}'
+
+
+def bucket_order(item):
+    (name, labels), _ = item
+    labels = dict(labels)
+    bound = labels.pop('le', None)
+    position = (math.inf if bound == '+Inf' else float(bound)
+                if bound is not None else 0)
+    return sorted(labels.items()), name, position
+
+
+def render():
+    """Текст для /metrics."""
+    counters, gauges = collect()
+    families = defaultdict(list)
+    for item in list(counters.items()) + list(gauges.items()):
+        families[family(item[0][0])].append(item)
+    lines = []
+    for name in sorted(families):
+        kind, description = FAMILIES.get(name, ('untyped', ''))
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {kind}')
+        for (sample, labels), value in sorted(families[name],
+                                              key=bucket_order):
+            lines.append(
+                f'{sample}{format_labels(labels)} {format_value(value)}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,142 @@
+"""
+Кэш и условные GET-запросы для вьюсетов.
+Ответ зависит от версий моделей из cache_dependencies (для объекта —
+detail_cache_dependencies). Зависимость задаётся моделью, именованной
+версией из api.cache или парой (модель, kwarg из URL) — тогда берётся
+версия одной строки. Сигналы
+в api.signals меняют версии, так что устаревшие ответы просто перестают
+читаться, а ETag и Last-Modified получаются без запросов к базе.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from .cache import (
+    get_versions_by_keys, make_key, object_version_key, version_key
+)
+from .prometheus import cache_event
+
+CONDITIONAL_METHODS = ('GET', 'HEAD')
+
+
+def normalized_params(request):
+    """Параметры запроса без учёта порядка."""
+    return sorted(
+        (key, value)
+        for key, values in request.query_params.lists()
+        for value in values
+    )
+
+
+class NotModified(Exception):
+    """Прерывает обработку запроса готовым ответом 304 или 412."""
+
+    def __init__(self, response):
+        self.response = response
+
+
+class VersionedResponseMixin:
+    """Версии моделей, от которых зависит ответ представления."""
+
+    cache_dependencies = ()
+    detail_cache_dependencies = ()
+
+    def get_cache_dependencies(self):
+        if getattr(self, 'detail', False) and self.detail_cache_dependencies:
+            return self.detail_cache_dependencies
+        return self.cache_dependencies
+
+    def dependency_key(self, dependency):
+        if isinstance(dependency, tuple):
+            model, kwarg = dependency
+            return object_version_key(model, self.kwargs[kwarg])
+        return version_key(dependency)
+
+    def response_versions(self):
+        """Версии зависимостей, одним обращением к кэшу за запрос."""
+        if getattr(self, '_response_versions', None) is None:
+            self._response_versions = get_versions_by_keys([
+                self.dependency_key(dependency)
+                for dependency in self.get_cache_dependencies()
+            ])
+        return self._response_versions
+
+    def response_key(self, prefix, request):
+        # Ссылки пагинации абсолютные: ответ зависит от схемы и хоста.
+        return make_key(
+            prefix, request.scheme, request.get_host(),
+            type(self).__name__, getattr(self, 'action', None),
+            request.accepted_media_type, normalized_params(request),
+            sorted(self.kwargs.items()), self.response_versions(),
+        )
+
+
+class ConditionalGetMixin(VersionedResponseMixin):
+    """
+    ETag и Last-Modified для GET-запросов.
+    Предусловия проверяются после аутентификации и проверки прав,
+    но до обработчика, так что 304 обходится без запросов к базе.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method not in CONDITIONAL_METHODS:
+            return
+        versions = self.response_versions()
+        # Ответ может зависеть от пользователя, например users/me.
+        self.etag = quote_etag(
+            self.response_key(type(self).__name__, request)
+            + f':{request.user.pk or 0}'
+        )
+        self.last_modified = max(versions) // 10 ** 9 if versions else None
+        response = get_conditional_response(
+            request, etag=self.etag, last_modified=self.last_modified
+        )
+        if response is not None:
+            raise NotModified(self.set_validators(response))
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def set_validators(self, response):
+        response['ETag'] = self.etag
+        if self.last_modified is not None:
+            response['Last-Modified'] = http_date(self.last_modified)
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response,
+                                             *args, **kwargs)
+        if (request.method in CONDITIONAL_METHODS
+                and response.status_code == 200
+                and getattr(self, 'etag', None)):
+            self.set_validators(response)
+        return response
+
+
+class CachedResponseMixin(VersionedResponseMixin):
+    """Отдаёт list и retrieve из кэша settings.RESPONSE_CACHE_ALIAS."""
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request,
+                                    *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        key = self.response_key('response', request)
+        cache = caches[settings.RESPONSE_CACHE_ALIAS]
+        data = cache.get(key)
+        cache_event('response', data is not None)
+        if data is not None:
+            return Response(data, headers={'X-Cache': 'HIT'})
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.RESPONSE_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+        return response
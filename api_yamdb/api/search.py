@@ -0,0 +1,71 @@
+"""Полнотекстовый поиск по произведениям."""
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+SEARCH_FIELDS = ('name', 'description')
+
+SQLITE_TABLE = 'reviews_title_fts'
+# Выражения совпадают с GIN-индексами из миграции reviews.0004.
+POSTGRESQL_VECTORS = {
+    SEARCH_FIELDS: (
+        "to_tsvector('simple', coalesce(reviews_title.name, '') || ' ' "
+        "|| coalesce(reviews_title.description, ''))"
+    ),
+    ('name',): "to_tsvector('simple', coalesce(reviews_title.name, ''))",
+}
+
+
+def sqlite_query(terms, fields):
+    """Запрос FTS5: все слова по префиксу, только в нужных столбцах."""
+    words = ' '.join(
+        '"{}"*'.format(term.replace('"', '""')) for term in terms
+    )
+    return '{{{}}} : ({})'.format(' '.join(fields), words)
+
+
+def postgresql_query(terms):
+    return ' & '.join(
+        "'{}':*".format(term.replace("'", "''").replace('\\', ''))
+        for term in terms
+    )
+
+
+def search_titles(queryset, terms, fields=SEARCH_FIELDS):
+    """
+    Отбирает произведения, содержащие все слова (по префиксу).
+    Добавляет аннотацию search_rank: чем больше, тем релевантнее.
+    """
+    terms = [term for term in terms if term.strip()]
+    if not terms:
+        return queryset
+    vendor = connections[queryset.db].vendor
+    if vendor == 'sqlite':
+        # Соединение с FTS-таблицей: ранг считается один раз на строку,
+        # а не коррелированным подзапросом.
+        return queryset.extra(
+            tables=[SQLITE_TABLE],
+            where=[f'{SQLITE_TABLE}.rowid = reviews_title.id',
+                   f'{SQLITE_TABLE} MATCH %s'],
+            params=[sqlite_query(terms, fields)],
+            select={'search_rank': f'-{SQLITE_TABLE}.rank'},
+        )
+    if vendor == 'postgresql':
+        vector = POSTGRESQL_VECTORS[tuple(fields)]
+        query = postgresql_query(terms)
+        return queryset.filter(RawSQL(
+            f"{vector} @@ to_tsquery('simple', %s)", (query,),
+            output_field=BooleanField()
+        )).annotate(search_rank=RawSQL(
+            f"ts_rank({vector}, to_tsquery('simple', %s))", (query,),
+            output_field=FloatField()
+        ))
+    condition = Q()
+    for term in terms:
+        term_condition = Q()
+        for field in fields:
+            term_condition |= Q(**{f'{field}__icontains': term})
+        condition &= term_condition
+    return queryset.filter(condition).annotate(
+        search_rank=Value(0.0, output_field=FloatField())
+    )
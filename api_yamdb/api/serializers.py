@@ -2,17 +2,20 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import default_token_generator
 from django.core.mail import send_mail
+from django.db import IntegrityError
 from django.db.models import Q
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError, NotFound
+from rest_framework.settings import api_settings
 from rest_framework.validators import UniqueTogetherValidator
 
+from api.autocomplete import INDEXES
 from reviews.models import (
     Category, Comment, Genre,
     Review, Title,
 )
 from reviews.validators import validate_username
-from reviews.constants import MAX_LENGTH_150
+from reviews.constants import MAX_LENGTH_150, MAX_LENGTH_256
 
 User = get_user_model()
 
@@ -123,6 +126,15 @@ class TokenSerializer(serializers.Serializer):
         return data
 
 
+class AutocompleteSerializer(serializers.Serializer):
+    """Параметры запроса автодополнения."""
+    q = serializers.CharField(max_length=MAX_LENGTH_256, required=True)
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=10)
+    types = serializers.MultipleChoiceField(
+        choices=tuple(INDEXES), required=False
+    )
+
+
 class CategorySerializer(serializers.ModelSerializer):
     """Сериализатор для категории."""
 
@@ -206,10 +218,20 @@ class ReviewSerializer(serializers.ModelSerializer):
         model = Review
         fields = ('id', 'text', 'author', 'score', 'pub_date')
 
-    def validate(self, data):
-        request = self.context['request']
-        if request.method == 'POST' and Review.objects.filter(
-            author=request.user, title__id=self.context['view'].get_title().id
-        ).exists():
-            raise ValidationError('Вы уже оставили отзыв на это произведение.')
-        return data
+    def create(self, validated_data):
+        """
+        Повторный отзыв отсекает ограничение unique_author_title_review:
+        отдельная проверка перед вставкой не нужна и не защищает от гонки
+        параллельных запросов.
+        """
+        try:
+            return super().create(validated_data)
+        except IntegrityError:
+            if not Review.objects.filter(
+                author=validated_data['author'],
+                title_id=validated_data['title_id']
+            ).exists():
+                raise
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [
+                'Вы уже оставили отзыв на это произведение.'
+            ]})
@@ -0,0 +1,137 @@
+"""
+Сброс версий моделей в кэше при изменении данных
+и обновление индексов автодополнения.
+Версии моделей сбрасываются после фиксации транзакции: до неё другие
+процессы ещё читают старые данные и закэшировали бы их под новой версией,
+а откат оставил бы версию сброшенной зря.
+"""
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from reviews.models import (
+    Category, Comment, Genre, Review, Title, token_versions_changed
+)
+from .authentication import REVOKED, store_token_version
+from .autocomplete import INDEXES
+from .cache import USERNAMES_VERSION, bump_object_version, bump_version
+
+VERSIONED_MODELS = (Category, Genre, Title, Review, Comment,
+                    get_user_model())
+
+
+def bump_sender_version(sender, **kwargs):
+    transaction.on_commit(partial(bump_version, sender))
+
+
+def bump_title_version(sender, instance, action, reverse, pk_set,
+                       **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    transaction.on_commit(partial(bump_version, Title))
+    if not reverse:
+        transaction.on_commit(
+            partial(bump_object_version, Title, instance.pk))
+    elif pk_set:
+        for pk in pk_set:
+            transaction.on_commit(partial(bump_object_version, Title, pk))
+    else:
+        # Очистка со стороны жанра: затронутые произведения неизвестны,
+        # поэтому сбрасывается версия жанров, входящая в ключи ответов.
+        transaction.on_commit(partial(bump_version, Genre))
+
+
+def bump_title_object_version(sender, instance, **kwargs):
+    """
+    Версия произведения меняется и при изменении его отзывов.
+    Отзыв, перенесённый к другому произведению, меняет версии обоих:
+    _title_id_in_db здесь ещё прежний, reviews.signals обновляет его
+    позже — приложение api стоит раньше в INSTALLED_APPS.
+    """
+    if sender is Title:
+        title_ids = {instance.pk}
+    else:
+        title_ids = {instance.title_id,
+                     getattr(instance, '_title_id_in_db', None)} - {None}
+    for title_id in title_ids:
+        transaction.on_commit(partial(bump_object_version, Title, title_id))
+
+
+def bump_review_object_version(sender, instance, **kwargs):
+    """Версия отзыва меняется при изменении его комментариев."""
+    transaction.on_commit(partial(
+        bump_object_version,
+        Review, instance.pk if sender is Review else instance.review_id
+    ))
+
+
+def store_token_versions(sender, versions, usernames, **kwargs):
+    """
+    Новые версии прав из базы записываются в общий кэш после фиксации,
+    смена имени сбрасывает ответы, в которых пользователь указан автором.
+    Сигнал отправляют и save(), и QuerySet.update() модели пользователя.
+    """
+    def apply():
+        for pk, version in versions.items():
+            store_token_version(pk, version)
+        bump_version(sender)
+        if usernames:
+            bump_version(USERNAMES_VERSION)
+
+    transaction.on_commit(apply)
+
+
+def revoke_user_tokens(sender, instance, **kwargs):
+    transaction.on_commit(partial(store_token_version, instance.pk, REVOKED))
+
+
+def update_prefix_index(sender, instance, raw=False, **kwargs):
+    """
+    Сбрасывает версию модели и точечно обновляет её индекс.
+    Строка индекса снимается сразу, а применяется после фиксации:
+    откат транзакции не должен оставить в индексе несуществующий объект.
+    """
+    index = INDEX_BY_MODEL[sender]
+    row = None if raw else index.instance_row(instance)
+
+    def apply():
+        bump_version(sender)
+        if row is None:
+            index.invalidate()
+        else:
+            index.update(row)
+
+    transaction.on_commit(apply)
+
+
+def remove_from_prefix_index(sender, instance, **kwargs):
+    index = INDEX_BY_MODEL[sender]
+    pk = instance.pk
+
+    def apply():
+        bump_version(sender)
+        index.remove(pk)
+
+    transaction.on_commit(apply)
+
+
+INDEX_BY_MODEL = {index.model: index for index in INDEXES.values()}
+
+for model in VERSIONED_MODELS:
+    if model in INDEX_BY_MODEL:
+        post_save.connect(update_prefix_index, sender=model)
+        post_delete.connect(remove_from_prefix_index, sender=model)
+    else:
+        post_save.connect(bump_sender_version, sender=model)
+        post_delete.connect(bump_sender_version, sender=model)
+for model in (Title, Review):
+    post_save.connect(bump_title_object_version, sender=model)
+    post_delete.connect(bump_title_object_version, sender=model)
+post_save.connect(bump_review_object_version, sender=Comment)
+for model in (Review, Comment):
+    post_delete.connect(bump_review_object_version, sender=model)
+token_versions_changed.connect(store_token_versions, sender=get_user_model())
+post_delete.connect(revoke_user_tokens, sender=get_user_model())
+m2m_changed.connect(bump_title_version, sender=Title.genre.through)
@@ -0,0 +1,97 @@
+"""
+Журнал медленных SQL-запросов.
+Ко всем соединениям добавляется обёртка, которая замеряет запросы и
+для превысивших settings.SLOW_QUERY_THRESHOLD_MS пишет в логгер
+api.slow_queries SQL, параметры, длительность, место вызова в коде
+проекта и план выполнения. None в настройке отключает журнал.
+"""
+import json
+import logging
+import os
+import sys
+import time
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+EXPLAINABLE = ('SELECT', 'WITH')
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна запись — одна строка JSON с полями из extra."""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'message': record.getMessage(),
+        }
+        entry.update(getattr(record, 'data', {}))
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def call_site():
+    """Ближайший кадр из кода проекта, не считая этого модуля."""
+    base_dir = str(settings.BASE_DIR)
+    frame = sys._getframe(2)
+    while frame is not None:
+        file_name = frame.f_code.co_filename
+        if (file_name.startswith(base_dir) and file_name != __file__
+                and 'site-packages' not in file_name):
+            return (f'{os.path.relpath(file_name, base_dir)}:'
+                    f'{frame.f_lineno} in {frame.f_code.co_name}')
+        frame = frame.f_back
+    return None
+
+
+def explain(connection, sql, params):
+    """
+    План запроса. Курсор берётся у драйвера напрямую, чтобы EXPLAIN
+    не прошёл через обёртки соединения и не попал в журнал и метрики.
+    """
+    cursor = connection.create_cursor()
+    try:
+        cursor.execute(
+            f'{connection.ops.explain_query_prefix()} {sql}', params)
+        return [str(row[-1]) for row in cursor.fetchall()]
+    except Exception as error:  # план не важнее самого запроса
+        return [f'EXPLAIN не выполнен: {error}']
+    finally:
+        cursor.close()
+
+
+def log_slow_query(execute, sql, params, many, context):
+    threshold = settings.SLOW_QUERY_THRESHOLD_MS
+    if threshold is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = (time.perf_counter() - started) * 1000
+        if duration >= threshold:
+            connection = context['connection']
+            plan = None
+            if not many and sql.lstrip().upper().startswith(EXPLAINABLE):
+                plan = explain(connection, sql, params)
+            logger.warning('Медленный запрос: %.1f мс', duration, extra={
+                'data': {
+                    'duration_ms': round(duration, 3),
+                    'database': connection.alias,
+                    'sql': sql,
+                    'params': params if not many else None,
+                    'call_site': call_site(),
+                    'plan': plan,
+                }
+            })
+
+
+@receiver(connection_created)
+def install_wrapper(sender, connection, **kwargs):
+    # В начало списка: connection.execute_wrapper() снимает свою
+    # обёртку через pop(), и наша не должна оказаться последней.
+    if log_slow_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, log_slow_query)
@@ -2,12 +2,15 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from .views import (
+    AutocompleteView,
     CategoryViewSet,
     GenreViewSet,
     TitleViewSet,
     CommentViewSet,
     ReviewViewSet,
+    ProfileView,
     SignupView,
+    StatsView,
     TokenView,
     UserModelViewSet,
 )
@@ -28,4 +31,8 @@ urlpatterns = [
     path('v1/', include(v1_router.urls)),
     path('v1/auth/signup/', SignupView.as_view(), name='signup'),
     path('v1/auth/token/', TokenView.as_view(), name='token'),
+    path('v1/autocomplete/', AutocompleteView.as_view(),
+         name='autocomplete'),
+    path('v1/stats/', StatsView.as_view(), name='stats'),
+    path('v1/profiles/<str:name>/', ProfileView.as_view(), name='profile'),
 ]
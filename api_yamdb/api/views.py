@@ -1,5 +1,9 @@
+import hmac
+import os
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.shortcuts import get_object_or_404
+from django.http import FileResponse, Http404, HttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
 
 from rest_framework import status, viewsets, filters
@@ -8,28 +12,34 @@ from rest_framework.filters import SearchFilter
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import AccessToken
-from django.db.models import Avg
 
-from reviews.models import Category, Title, Genre, Review
+from reviews.models import Category, Comment, Title, Genre, Review
+from api.authentication import ClaimsAccessToken, full_user
+from api.cache import USERNAMES_VERSION
+from api.autocomplete import autocomplete
+from api import prometheus
+from api.metrics import registry
 from api.serializers import (
-    CategorySerializer, TitleSerializer, GenreSerializer, ReviewSerializer,
-    CommentSerializer, SignupSerializer, TokenSerializer, UserModelSerializer,
-    TitleSerializerForRead
+    AutocompleteSerializer, CategorySerializer, TitleSerializer,
+    GenreSerializer, ReviewSerializer, CommentSerializer, SignupSerializer,
+    TokenSerializer, UserModelSerializer, TitleSerializerForRead
 )
 from api.permissions import (
     IsAdmin, IsStuffOrAuthor, IsAdminOrReadOnly
 )
 from api.baseviewset import BaseCategoryGenreViewSet
-from api.filtres import TitleFilter
+from api.filtres import TitleFilter, TitleSearchFilter
+from api.pagination import OptionalCursorPagination
+from api.response_cache import CachedResponseMixin, ConditionalGetMixin
 
 
 User = get_user_model()
 
 
-class UserModelViewSet(viewsets.ModelViewSet):
+class UserModelViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """Вьюсет для управления пользователями."""
     queryset = User.objects.all()
+    cache_dependencies = (User,)
     serializer_class = UserModelSerializer
     permission_classes = (IsAdmin,)
     filter_backends = (SearchFilter,)
@@ -41,7 +51,7 @@ class UserModelViewSet(viewsets.ModelViewSet):
             permission_classes=(IsAuthenticated,))
     def me(self, request):
         """Эндпоинт для изменения профиля текущего пользователя."""
-        user = self.request.user
+        user = full_user(self.request.user)
         if request.method == 'GET':
             serializer = self.get_serializer(user)
             return Response(serializer.data)
@@ -59,6 +69,7 @@ class CategoryViewSet(BaseCategoryGenreViewSet):
 
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    cache_dependencies = (Category,)
 
 
 class GenreViewSet(BaseCategoryGenreViewSet):
@@ -66,23 +77,35 @@ class GenreViewSet(BaseCategoryGenreViewSet):
 
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    cache_dependencies = (Genre,)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(ConditionalGetMixin, CachedResponseMixin,
+                   viewsets.ModelViewSet):
     """Класс произведений."""
 
-    queryset = Title.objects.annotate(
-        rating=Avg('reviews__score')
-    )
+    queryset = Title.objects.all()
     http_method_names = ('get', 'post', 'patch', 'delete')
     permission_classes = (IsAdminOrReadOnly,)
     filter_backends = (DjangoFilterBackend,
-                       filters.OrderingFilter, filters.SearchFilter)
+                       filters.OrderingFilter, TitleSearchFilter)
     filterset_class = TitleFilter
-    search_fields = ('name',)
+    pagination_class = OptionalCursorPagination
+    count_dependencies = (Title, Genre, Category)
+    # Рейтинг в ответах зависит от отзывов.
+    cache_dependencies = (Title, Genre, Category, Review)
+    detail_cache_dependencies = ((Title, 'pk'), Genre, Category)
     ordering_fields = ('name', 'year')
     ordering = ('name',)
 
+    def get_queryset(self):
+        """Жанры и категория подгружаются заранее для чтения."""
+        if self.request.method == 'GET':
+            return self.queryset.select_related(
+                'category'
+            ).prefetch_related('genre')
+        return self.queryset
+
     def get_serializer_class(self):
         """Выбор сериализатора в зависимости от метода запроса."""
         if self.request.method == 'GET':
@@ -90,63 +113,170 @@ class TitleViewSet(viewsets.ModelViewSet):
         return TitleSerializer
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """Класс отзывов."""
 
     permission_classes = (IsStuffOrAuthor,)
     serializer_class = ReviewSerializer
     filter_backends = (filters.SearchFilter,)
     search_fields = ('title__id',)
+    pagination_class = OptionalCursorPagination
     http_method_names = ('get', 'post', 'patch', 'delete')
     queryset = Review.objects.all()
     lookup_field = 'id'
     lookup_url_kwarg = 'review_id'
+    # Версия произведения меняется при изменении его отзывов.
+    cache_dependencies = ((Title, 'title_id'), USERNAMES_VERSION)
+
+    # id произведения из URL, проверенный на существование.
+    title_id = None
 
     def get_queryset(self):
         """Возвращает отзывы для указанного произведения."""
-        title = self.get_title()
-        return title.reviews.all()
+        if self.detail:
+            # Отзыв ищется сразу с условием на произведение.
+            title_id = self.kwargs['title_id']
+        else:
+            title_id = self.get_title_id()
+        reviews = Review.objects.filter(
+            title_id=title_id
+        ).select_related('author')
+        if self.request.method == 'GET':
+            # Для чтения хватает полей сериализатора и имени автора.
+            return reviews.only('text', 'score', 'pub_date',
+                                'author__username')
+        return reviews
 
-    def get_title(self):
+    def get_title_id(self):
         """
-        Возвращает объект произведения по его id из URL.
+        Возвращает id произведения из URL, один раз за запрос
+        проверив, что оно существует.
         """
-        title_id = self.kwargs.get('title_id')
-        return get_object_or_404(Title, id=title_id)
+        if self.title_id is None:
+            title_id = int(self.kwargs['title_id'])
+            if not Title.objects.filter(id=title_id).exists():
+                raise Http404('Произведение не найдено.')
+            self.title_id = title_id
+        return self.title_id
 
     def perform_create(self, serializer):
         """
         Устанавливает автора и произведение при создании отзыва.
         """
-        title = self.get_title()
-        serializer.save(author=self.request.user, title=title)
+        serializer.save(author=self.request.user,
+                        title_id=self.get_title_id())
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """Класс комментов."""
 
     permission_classes = (IsStuffOrAuthor,)
     serializer_class = CommentSerializer
     filter_backends = (filters.SearchFilter,)
     search_fields = ('title__id', 'reviews__id')
+    pagination_class = OptionalCursorPagination
     http_method_names = ('get', 'post', 'patch', 'delete')
+    # Версия отзыва меняется при изменении его комментариев.
+    cache_dependencies = ((Review, 'review_id'), USERNAMES_VERSION)
+
+    # id отзыва из URL, проверенный на существование.
+    review_id = None
 
-    def get_review(self):
-        """Возвращает объект Review по 'review_id'."""
-        return get_object_or_404(Review, id=self.kwargs['review_id'],
-                                 title_id=self.kwargs.get('title_id'))
+    def get_review_id(self):
+        """
+        Возвращает id отзыва из URL, один раз за запрос проверив,
+        что он относится к произведению из URL.
+        """
+        if self.review_id is None:
+            review_id = int(self.kwargs['review_id'])
+            if not Review.objects.filter(
+                id=review_id, title_id=self.kwargs['title_id']
+            ).exists():
+                raise Http404('Отзыв не найден.')
+            self.review_id = review_id
+        return self.review_id
 
     def get_queryset(self):
-        return self.get_review().comments.all()
+        if self.detail:
+            comments = Comment.objects.filter(
+                review_id=self.kwargs['review_id'],
+                review__title_id=self.kwargs['title_id'],
+            )
+        else:
+            comments = Comment.objects.filter(review_id=self.get_review_id())
+        comments = comments.select_related('author')
+        if self.request.method == 'GET':
+            return comments.only('text', 'pub_date', 'author__username')
+        return comments
 
     def perform_create(self, serializer):
-        review = self.get_review()
         serializer.save(
             author=self.request.user,
-            review=review,
+            review_id=self.get_review_id(),
         )
 
 
+class AutocompleteView(ConditionalGetMixin, APIView):
+    """Подсказки по началу названий произведений, жанров и категорий."""
+
+    authentication_classes = ()
+    permission_classes = (AllowAny,)
+    cache_dependencies = (Title, Genre, Category)
+
+    def get(self, request):
+        serializer = AutocompleteSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        return Response(autocomplete(
+            params['q'], params['limit'], sorted(params.get('types') or ())
+        ))
+
+
+class StatsView(APIView):
+    """Метрики запросов по представлениям для администратора."""
+
+    permission_classes = (IsAdmin,)
+
+    def get(self, request):
+        return Response(registry.snapshot())
+
+    def delete(self, request):
+        registry.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class ProfileView(APIView):
+    """Скачивание сохранённого профиля запроса."""
+
+    permission_classes = (IsAdmin,)
+
+    def get(self, request, name):
+        path = os.path.join(settings.PROFILE_DIR, os.path.basename(name))
+        if not os.path.isfile(path):
+            raise Http404
+        return FileResponse(open(path, 'rb'), as_attachment=True)
+
+
+def metrics(request):
+    """
+    Метрики всех воркеров в текстовом формате Prometheus.
+    Доступны только с токеном settings.METRICS_TOKEN в заголовке
+    Authorization: Bearer; без настроенного токена эндпоинта нет.
+    """
+    token = settings.METRICS_TOKEN
+    if not token:
+        raise Http404
+    if not hmac.compare_digest(
+        request.headers.get('Authorization', '').encode(),
+        f'Bearer {token}'.encode()
+    ):
+        response = HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+        response['WWW-Authenticate'] = 'Bearer'
+        return response
+    return HttpResponse(prometheus.render(),
+                        content_type='text/plain; version=0.0.4')
+
+
 class SignupView(APIView):
     """Регистрация пользователя и отправка confirmation_code."""
 
@@ -172,6 +302,6 @@ class TokenView(APIView):
         serializer = TokenSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         user = User.objects.get(username=serializer.validated_data['username'])
-        token = AccessToken.for_user(user)
+        token = ClaimsAccessToken.for_user(user)
 
         return Response({'token': str(token)}, status=status.HTTP_200_OK)
@@ -1,6 +1,7 @@
 from datetime import timedelta
 from pathlib import Path
 import os
+import tempfile
 
 from dotenv import load_dotenv
 
@@ -9,6 +10,14 @@ load_dotenv()
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+
+def optional_float(value):
+    """Число из переменной окружения; пустое значение или none — None."""
+    if value is None or value.strip().lower() in ('', 'none'):
+        return None
+    return float(value)
+
+
 SECRET_KEY = os.getenv('SECRET_KEY')
 if not SECRET_KEY:
     raise ValueError("SECRET_KEY не найден в .env файле")
@@ -35,6 +44,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.PerformanceMiddleware',
+    'api.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -70,10 +81,98 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Тестовая база в файле, а не в памяти: только так параллельные
+        # запросы в тестах ждут блокировок SQLite, как в рабочей базе.
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
 
+# Любой бэкенд кэша Django, например django-redis для нескольких серверов.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    # Файловый кэш — для разработки: каталог внутри проекта, чтобы его не
+    # мог подменить другой пользователь (Django распаковывает файлы кэша
+    # через pickle) и не делили разные копии проекта. Каждая запись
+    # перебирает все файлы каталога, поэтому в продакшене здесь нужен
+    # Memcached (PyMemcacheCache) или Redis.
+    'versions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('VERSION_CACHE_LOCATION',
+                              str(BASE_DIR / 'cache' / 'versions')),
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+}
+
+# Алиас из CACHES для версий моделей и версий прав пользователей
+# (api.cache, api.authentication). По версиям сбрасываются кэши ответов
+# и отзываются токены, поэтому кэш должен быть общим для всех процессов.
+# Локальные кэши отклоняет проверка api.E001.
+VERSION_CACHE_ALIAS = 'versions'
+
+# Алиас из CACHES для кэша ответов и время жизни ответа в секундах.
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = 300
+
+# Сколько секунд хранится количество объектов для пагинации.
+COUNT_CACHE_TIMEOUT = 60
+
+# Каталог, через который воркеры gunicorn объединяют метрики /metrics.
+# Без него /metrics показывает только текущий процесс.
+METRICS_DIR = os.getenv('METRICS_DIR')
+# Как часто (в секундах) процесс сохраняет свои метрики в METRICS_DIR.
+METRICS_FLUSH_INTERVAL = 1
+# Токен для Authorization: Bearer при чтении /metrics. Без него
+# эндпоинт отключён и отвечает 404.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+# Запросы дольше порога (мс) пишутся с планом выполнения
+# в SLOW_QUERY_LOG_FILE; None (пустое значение или none) отключает журнал.
+SLOW_QUERY_THRESHOLD_MS = optional_float(
+    os.getenv('SLOW_QUERY_THRESHOLD_MS', '200')
+)
+SLOW_QUERY_LOG_FILE = os.getenv(
+    'SLOW_QUERY_LOG_FILE', BASE_DIR / 'slow_queries.log'
+)
+
+# Профили запросов с X-Profile и интервал семплирования в секундах.
+# Хранятся не больше PROFILE_MAX_FILES последних профилей.
+PROFILE_DIR = os.getenv(
+    'PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'api_yamdb_profiles')
+)
+PROFILE_SAMPLE_INTERVAL = 0.001
+PROFILE_MAX_FILES = 100
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {'()': 'api.slow_queries.JsonFormatter'},
+    },
+    'handlers': {
+        'slow_queries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG_FILE,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'encoding': 'utf-8',
+            'delay': True,
+            'formatter': 'json',
+        },
+    },
+    'loggers': {
+        'api.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -116,9 +215,9 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.StatelessJWTAuthentication',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.CachedCountPagination',
     'PAGE_SIZE': 10,
 }
 
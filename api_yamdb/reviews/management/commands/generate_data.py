@@ -0,0 +1,237 @@
+import csv
+import os
+import random
+import time
+from array import array
+from bisect import bisect
+from datetime import datetime, timedelta, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.management.commands.import_all import TABLES
+
+SYLLABLES = ('ка', 'ло', 'ми', 'ра', 'ту', 'не', 'зо', 'ви', 'ше', 'да',
+             'ру', 'ле', 'по', 'со', 'ны', 'бе')
+FIRST_DATE = datetime(2015, 1, 1, tzinfo=timezone.utc)
+DATE_RANGE_SECONDS = 10 * 365 * 24 * 3600
+# Выше этой доли пользователей авторы отзыва выбираются без весов:
+# отбор с отказами по Ципфу почти не находит редких авторов.
+UNIFORM_AUTHORS_SHARE = 0.25
+
+
+class Zipf:
+    """
+    Распределение Ципфа по рангам 1..size: вес ранга r равен 1 / r**s.
+    Хранит только накопленные веса — size чисел double.
+    """
+
+    def __init__(self, size, exponent):
+        self.cumulative = array('d')
+        total = 0.0
+        for rank in range(1, size + 1):
+            total += rank ** -exponent
+            self.cumulative.append(total)
+        self.total = total
+
+    def __len__(self):
+        return len(self.cumulative)
+
+    def share(self, rank):
+        """Накопленная доля рангов 1..rank."""
+        return self.cumulative[rank - 1] / self.total if rank else 0.0
+
+    def sample(self, rng):
+        return bisect(self.cumulative, rng.random() * self.total) + 1
+
+
+def split(total, zipf, rank):
+    """
+    Доля total, приходящаяся на ранг: разность округлённых накопленных
+    долей, поэтому сумма по всем рангам равна total в точности.
+    """
+    return (round(total * zipf.share(rank))
+            - round(total * zipf.share(rank - 1)))
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерирует синтетический набор данных в формате import_all. '
+        'Популярность произведений и активность пользователей распределены '
+        'по Ципфу, результат определяется параметром --seed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', required=True,
+                            help='Каталог для CSV-файлов.')
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--genres', type=int, default=30)
+        parser.add_argument('--titles', type=int, default=10_000)
+        parser.add_argument('--users', type=int, default=10_000)
+        parser.add_argument('--reviews', type=int, default=100_000)
+        parser.add_argument('--comments', type=int, default=300_000)
+        parser.add_argument('--zipf', type=float, default=1.0,
+                            help='Показатель распределения Ципфа.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--force', action='store_true',
+                            help='Перезаписать существующие файлы.')
+
+    def handle(self, *args, **options):
+        self.path = options['path']
+        self.rng = random.Random(options['seed'])
+        for name in ('categories', 'genres', 'titles', 'users'):
+            if options[name] < 1:
+                raise CommandError(f'--{name} должно быть больше нуля.')
+        if options['reviews'] > options['titles'] * options['users']:
+            raise CommandError(
+                'Отзывов больше, чем пар пользователь — произведение.')
+        os.makedirs(self.path, exist_ok=True)
+        existing = [table.file_name for table in TABLES.values()
+                    if os.path.exists(self.file_path(table.file_name))]
+        if existing and not options['force']:
+            raise CommandError(
+                f'Файлы уже существуют: {", ".join(existing)}. '
+                'Используйте --force, чтобы перезаписать их.')
+        self.vocabulary = sorted({
+            ''.join(self.rng.choices(SYLLABLES, k=self.rng.randint(2, 4)))
+            for _ in range(5000)
+        })
+        self.rng.shuffle(self.vocabulary)
+        self.words = Zipf(len(self.vocabulary), options['zipf'])
+
+        self.write('categories', (
+            (pk, f'Категория {pk}', f'category-{pk}')
+            for pk in range(1, options['categories'] + 1)
+        ))
+        self.write('genres', (
+            (pk, f'Жанр {pk}', f'genre-{pk}')
+            for pk in range(1, options['genres'] + 1)
+        ))
+        self.write('users', (
+            (pk, f'user{pk}', f'user{pk}@yamdb.fake', 'user', '', '', '')
+            for pk in range(1, options['users'] + 1)
+        ))
+        self.write('titles', self.titles(options))
+        self.write('genre_title', self.genre_titles(options))
+        self.users = Zipf(options['users'], options['zipf'])
+        self.write_reviews(options)
+
+    def file_path(self, file_name):
+        return os.path.join(self.path, file_name)
+
+    def open(self, name, header):
+        file = open(self.file_path(TABLES[name].file_name), 'w',
+                    newline='', encoding='utf-8')
+        writer = csv.writer(file)
+        writer.writerow(header)
+        return file, writer
+
+    def write(self, name, rows):
+        started = time.perf_counter()
+        header = {
+            'categories': ('id', 'name', 'slug'),
+            'genres': ('id', 'name', 'slug'),
+            'users': ('id', 'username', 'email', 'role', 'bio',
+                      'first_name', 'last_name'),
+            'titles': ('id', 'name', 'year', 'category', 'description'),
+            'genre_title': ('id', 'title_id', 'genre_id'),
+        }[name]
+        file, writer = self.open(name, header)
+        with file:
+            count = 0
+            for count, row in enumerate(rows, 1):
+                writer.writerow(row)
+        self.report(name, count, started)
+
+    def text(self, low, high):
+        return ' '.join(self.rng.choices(
+            self.vocabulary, cum_weights=self.words.cumulative,
+            k=self.rng.randint(low, high)
+        )).capitalize()
+
+    def date(self):
+        moment = FIRST_DATE + timedelta(
+            seconds=self.rng.randrange(DATE_RANGE_SECONDS),
+            milliseconds=self.rng.randrange(1000),
+        )
+        return moment.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+
+    def titles(self, options):
+        # Номер в названии, как в benchmark_search: случайные названия
+        # повторяются и нарушали бы unique_title_category.
+        for pk in range(1, options['titles'] + 1):
+            yield (pk, f'{self.text(1, 4)} {pk}',
+                   self.rng.randint(1900, 2024),
+                   self.rng.randint(1, options['categories']),
+                   self.text(5, 30))
+
+    def genre_titles(self, options):
+        genres = Zipf(options['genres'], options['zipf'])
+        pk = 0
+        for title_id in range(1, options['titles'] + 1):
+            picked = {genres.sample(self.rng)
+                      for _ in range(self.rng.randint(1, 3))}
+            for genre_id in sorted(picked):
+                pk += 1
+                yield pk, title_id, genre_id
+
+    def authors(self, count):
+        """count разных пользователей, активные попадаются чаще."""
+        size = len(self.users)
+        if count > size * UNIFORM_AUTHORS_SHARE:
+            return self.rng.sample(range(1, size + 1), count)
+        picked = set()
+        while len(picked) < count:
+            picked.add(self.users.sample(self.rng))
+        return sorted(picked)
+
+    def write_reviews(self, options):
+        """
+        Отзывы и комментарии пишутся за один проход по произведениям.
+        Произведение с id = r имеет r-й ранг популярности; его доля
+        отзывов и комментариев берётся из распределения Ципфа. Отзывы
+        одного произведения получают подряд идущие id, поэтому
+        комментарий выбирает отзыв по диапазону, не храня их в памяти.
+        """
+        started = time.perf_counter()
+        titles = Zipf(options['titles'], options['zipf'])
+        reviews_file, reviews = self.open(
+            'reviews', ('id', 'title_id', 'text', 'author', 'score',
+                        'pub_date'))
+        comments_file, comments = self.open(
+            'comments', ('id', 'review_id', 'text', 'author', 'pub_date'))
+        review_id = comment_id = 0
+        # Излишек отзывов сверх числа пользователей и комментарии
+        # к произведениям без отзывов переходят к следующему.
+        review_carry = comment_carry = 0
+        with reviews_file, comments_file:
+            for title_id in range(1, options['titles'] + 1):
+                wanted = split(options['reviews'], titles, title_id)
+                count = min(wanted + review_carry, options['users'])
+                review_carry += wanted - count
+                mean = self.rng.uniform(3, 9)
+                first_review = review_id + 1
+                for author in self.authors(count):
+                    review_id += 1
+                    score = min(10, max(1, round(self.rng.gauss(mean, 2))))
+                    reviews.writerow((review_id, title_id, self.text(5, 60),
+                                      author, score, self.date()))
+                comment_carry += split(options['comments'], titles, title_id)
+                if not count:
+                    continue
+                for _ in range(comment_carry):
+                    comment_id += 1
+                    comments.writerow((
+                        comment_id,
+                        self.rng.randint(first_review, review_id),
+                        self.text(3, 30),
+                        self.users.sample(self.rng),
+                        self.date(),
+                    ))
+                comment_carry = 0
+        self.report('reviews', review_id, started)
+        self.report('comments', comment_id, started)
+
+    def report(self, name, count, started):
+        self.stdout.write(
+            f'{TABLES[name].file_name}: {count} строк за '
+            f'{time.perf_counter() - started:.1f} с.')
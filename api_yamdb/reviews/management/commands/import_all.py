@@ -1,112 +1,432 @@
 import csv
+import json
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Manager
+from contextlib import contextmanager, nullcontext
+from itertools import islice
 
+import django
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.management.base import BaseCommand
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
 
+from api.cache import reset_versions
 from reviews.models import (
     Category, Genre, Title, Review, Comment
 )
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
 User = get_user_model()
+GenreTitle = Title.genre.through
+
+Table = namedtuple('Table', 'label file_name model build references')
+
+# Порядок учитывает внешние ключи.
+TABLES = {
+    'categories': Table(
+        'категорий', 'category.csv', Category,
+        lambda row: Category(**row), {}
+    ),
+    'genres': Table(
+        'жанров', 'genre.csv', Genre,
+        lambda row: Genre(**row), {}
+    ),
+    'titles': Table(
+        'произведений', 'titles.csv', Title,
+        lambda row: Title(
+            id=row['id'],
+            name=row['name'],
+            year=row['year'],
+            category_id=int(row['category']),
+            description=row.get('description') or '',
+        ),
+        {'category_id': Category}
+    ),
+    'genre_title': Table(
+        'жанров произведений', 'genre_title.csv', GenreTitle,
+        lambda row: GenreTitle(
+            id=row['id'],
+            title_id=int(row['title_id']),
+            genre_id=int(row['genre_id']),
+        ),
+        {'title_id': Title, 'genre_id': Genre}
+    ),
+    'users': Table(
+        'пользователей', 'users.csv', User,
+        lambda row: User(**row), {}
+    ),
+    'reviews': Table(
+        'отзывов', 'review.csv', Review,
+        lambda row: Review(
+            id=row['id'],
+            title_id=int(row['title_id']),
+            text=row['text'],
+            score=row['score'],
+            author_id=int(row['author']),
+            pub_date=row['pub_date'],
+        ),
+        {'title_id': Title, 'author_id': User}
+    ),
+    'comments': Table(
+        'комментариев', 'comments.csv', Comment,
+        lambda row: Comment(
+            id=row['id'],
+            review_id=int(row['review_id']),
+            text=row['text'],
+            author_id=int(row['author']),
+            pub_date=row['pub_date'],
+        ),
+        {'review_id': Review, 'author_id': User}
+    ),
+}
+
+
+# Таблицы одного этапа не зависят друг от друга.
+STAGES = (
+    ('categories', 'genres', 'users'),
+    ('titles',),
+    ('genre_title', 'reviews'),
+    ('comments',),
+)
+SQLITE_BUSY_TIMEOUT_MS = 60_000
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+@contextmanager
+def keep_pub_date(model):
+    """Отключает auto_now_add, чтобы сохранить даты из файла."""
+    fields = [field for field in model._meta.concrete_fields
+              if getattr(field, 'auto_now_add', False)]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class OffsetLines:
+    """
+    Строки бинарного файла для csv.reader.
+    csv.reader не читает наперёд, поэтому offset после очередной записи
+    указывает ровно на начало следующей.
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self.offset = file.tell()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.file.readline()
+        if not line:
+            raise StopIteration
+        self.offset += len(line)
+        return line.decode('utf-8')
+
+
+def read_rows(file, offset=None):
+    """Строки CSV (словари) начиная с заголовка или с байтового смещения."""
+    fieldnames = next(csv.reader(OffsetLines(file)))
+    if offset:
+        file.seek(offset)
+    lines = OffsetLines(file)
+    return lines, csv.DictReader(lines, fieldnames=fieldnames)
+
+
+def rows_until(lines, rows, stop):
+    """Строки до байтового смещения stop (None — до конца файла)."""
+    for row in rows:
+        yield row
+        if stop is not None and lines.offset >= stop:
+            return
+
+
+def plan_shards(file_path, shards, step):
+    """
+    Делит файл на shards диапазонов [start, stop) по границам записей.
+    Смещения запоминаются через каждые step строк, чтобы память
+    не росла с размером файла. Границы записей ищутся отдельным
+    проходом по файлу: в кавычках CSV бывают переводы строк.
+    """
+    with open(file_path, 'rb') as file:
+        lines, rows = read_rows(file)
+        marks = [lines.offset]
+        for number, _ in enumerate(rows, 1):
+            if number % step == 0:
+                marks.append(lines.offset)
+    bounds = sorted({marks[len(marks) * part // shards]
+                     for part in range(shards)})
+    return list(zip(bounds, bounds[1:] + [None]))
+
+
+def import_shard(name, file_path, start, stop, batch_size, write_lock=None):
+    """
+    Импорт диапазона файла в отдельном процессе.
+    Каждая пачка фиксируется сразу. SQLite допускает одного писателя,
+    а отложенные транзакции двух писателей взаимно блокируются,
+    поэтому для неё запись идёт под общим write_lock; разбор CSV
+    и проверки связей остаются параллельными.
+    """
+    table = TABLES[name]
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}')
+    processed = skipped = 0
+    with open(file_path, 'rb') as file, keep_pub_date(table.model):
+        lines, rows = read_rows(file, start)
+        rows = rows_until(lines, rows, stop)
+        for batch in batched(map(table.build, rows), batch_size):
+            objects = drop_orphans(batch, table.references)
+            with write_lock or nullcontext(), transaction.atomic():
+                table.model.objects.bulk_create(objects,
+                                                ignore_conflicts=True)
+            processed += len(objects)
+            skipped += len(batch) - len(objects)
+    return processed, skipped
+
+
+def drop_orphans(objects, references):
+    """Убирает объекты, чьих связанных записей нет: запрос на поле."""
+    for field, model in references.items():
+        existing = set(model.objects.filter(
+            id__in={getattr(obj, field) for obj in objects}
+        ).values_list('id', flat=True))
+        objects = [obj for obj in objects
+                   if getattr(obj, field) in existing]
+    return objects
+
+
+def peak_memory_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux отдаёт килобайты, macOS — байты.
+    return peak / 1024 ** (2 if sys.platform == 'darwin' else 1)
+
+
+class Checkpoint:
+    """Прогресс импорта по файлам: байтовое смещение и число строк."""
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            with open(path, encoding='utf-8') as file:
+                self.state = json.load(file)
+        except FileNotFoundError:
+            self.state = {}
+
+    def get(self, file_name):
+        return self.state.get(file_name, {})
+
+    def save(self, file_name, **progress):
+        self.state[file_name] = progress
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as file:
+            json.dump(self.state, file)
+        os.replace(temporary, self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
 
 
 class Command(BaseCommand):
+    help = 'Импортирует данные из CSV-файлов в базу данных.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default=settings.BASE_DIR / 'static' / 'data',
+            help='Каталог с CSV-файлами.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Количество строк в одном bulk_create.'
+        )
+        parser.add_argument(
+            '--only', type=lambda value: value.split(','),
+            default=tuple(TABLES),
+            help=f'Таблицы через запятую: {", ".join(TABLES)}.'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help=('Файл прогресса. С ним каждая пачка фиксируется отдельно, '
+                  'а повторный запуск продолжает с места остановки.')
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help=('Число процессов. Независимые таблицы загружаются '
+                  'параллельно, файлы делятся на диапазоны строк. '
+                  'Ускоряет импорт только в PostgreSQL: SQLite допускает '
+                  'одного писателя, и там быстрее импорт по умолчанию '
+                  'в один процесс.')
+        )
 
-    def handle(self, *args, **kwargs):
-        self.import_categories()
-        self.import_genres()
-        self.import_titles()
-        self.import_users()
-        self.import_reviews()
-        self.import_comments()
-
-    def import_categories(self):
-        file_path = 'static/data/category.csv'
-        categories = []
-        with open(file_path, 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                categories.append(Category(**row))
-        Category.objects.bulk_create(categories, ignore_conflicts=True)
-        self.stdout.write(self.style.SUCCESS('Импорт категорий завершён.'))
-
-    def import_genres(self):
-        file_path = 'static/data/genre.csv'
-        genres = []
-        with open(file_path, 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                genres.append(Genre(**row))
-        Genre.objects.bulk_create(genres, ignore_conflicts=True)
-        self.stdout.write(self.style.SUCCESS('Импорт жанров завершён.'))
-
-    def import_titles(self):
-        file_path = 'static/data/titles.csv'
-        titles = []
-        with open(file_path, 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                category = Category.objects.get(id=row['category'])
-                titles.append(Title(
-                    id=row['id'],
-                    name=row['name'],
-                    year=row['year'],
-                    category=category
-                ))
-        Title.objects.bulk_create(titles, ignore_conflicts=True)
-        self.stdout.write(self.style.SUCCESS('Импорт произведений завершён.'))
-
-    def import_users(self):
-        file_path = 'static/data/users.csv'
-        users = []
-        with open(file_path, 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                users.append(User(**row))
-        User.objects.bulk_create(users, ignore_conflicts=True)
-        self.stdout.write(self.style.SUCCESS('Импорт пользователей завершён.'))
-
-    def import_reviews(self):
-        file_path = 'static/data/review.csv'
-        reviews = []
-
-        with open(file_path, 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                title = Title.objects.get(id=row['title_id'])
-                author = User.objects.get(id=row['author'])
-                reviews.append(Review(
-                    id=row['id'],
-                    title_id=title.id,  # Указываем title_id
-                    text=row['text'],
-                    score=row['score'],
-                    author=author,
-                    pub_date=row['pub_date']
-                ))
-
-        Review.objects.bulk_create(reviews, ignore_conflicts=True)
-        self.stdout.write(self.style.SUCCESS('Импорт отзывов завершён.'))
-
-    def import_comments(self):
-        file_path = 'static/data/comments.csv'
-        comments = []
-
-        with open(file_path, 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                review = Review.objects.get(id=row['review_id'])
-                title = review.title
-                author = User.objects.get(id=row['author'])
-
-                comments.append(Comment(
-                    id=row['id'],
-                    review=review,
-                    title=title,
-                    text=row['text'],
-                    author=author,
-                    pub_date=row['pub_date']
-                ))
-
-        Comment.objects.bulk_create(comments, ignore_conflicts=True)
+    def handle(self, *args, **options):
+        self.path = options['path']
+        self.batch_size = options['batch_size']
+        self.checkpoint = (Checkpoint(options['checkpoint'])
+                           if options['checkpoint'] else None)
+        unknown = set(options['only']) - set(TABLES)
+        if unknown:
+            raise CommandError(
+                f'Неизвестные таблицы: {", ".join(sorted(unknown))}.')
+        if options['workers'] > 1 and self.checkpoint:
+            raise CommandError(
+                '--workers и --checkpoint нельзя использовать вместе.')
+        if options['workers'] > 1 and connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING(
+                'SQLite записывает в один поток: с --workers импорт '
+                'медленнее, чем в один процесс.'))
+        started = time.perf_counter()
+        if options['workers'] > 1:
+            self.import_parallel(options['only'], options['workers'])
+        else:
+            for name, table in TABLES.items():
+                if name in options['only']:
+                    self.import_table(table)
         self.stdout.write(
-            self.style.SUCCESS('Импорт комментариев завершён.'))
+            f'Общее время импорта: {time.perf_counter() - started:.2f} с.')
+        if 'reviews' in options['only']:
+            call_command('rebuild_ratings', stdout=self.stdout)
+        # bulk_create не отправляет сигналы, поэтому сбрасываются все
+        # версии моделей, а с ними и производные значения в кэше.
+        reset_versions()
+        if self.checkpoint:
+            self.checkpoint.remove()
+
+    def import_table(self, table):
+        """
+        Потоково читает CSV и сохраняет строки пачками: в одной транзакции
+        на таблицу или, с --checkpoint, в транзакции на пачку с записью
+        прогресса после каждой.
+        """
+        progress = self.checkpoint.get(table.file_name) \
+            if self.checkpoint else {}
+        if progress.get('done'):
+            self.stdout.write(f'Импорт {table.label} уже выполнен.')
+            return
+        started = time.perf_counter()
+        rows_done = progress.get('rows', 0)
+        processed = skipped = 0
+        table_transaction, batch_transaction = (
+            (nullcontext, transaction.atomic) if self.checkpoint
+            else (transaction.atomic, nullcontext)
+        )
+        with open(f'{self.path}/{table.file_name}', 'rb') as file, \
+                table_transaction(), keep_pub_date(table.model):
+            lines, rows = read_rows(file, progress.get('offset'))
+            for batch in batched(map(table.build, rows), self.batch_size):
+                objects = drop_orphans(batch, table.references)
+                with batch_transaction():
+                    table.model.objects.bulk_create(
+                        objects, ignore_conflicts=True
+                    )
+                processed += len(objects)
+                skipped += len(batch) - len(objects)
+                if self.checkpoint:
+                    self.checkpoint.save(
+                        table.file_name, offset=lines.offset,
+                        rows=rows_done + processed + skipped
+                    )
+        if self.checkpoint:
+            self.checkpoint.save(table.file_name, done=True,
+                                 rows=rows_done + processed + skipped)
+        self.report(table, processed, skipped, time.perf_counter() - started)
+
+    def import_parallel(self, selected, workers):
+        """
+        Этапы идут последовательно в порядке внешних ключей, внутри этапа
+        все диапазоны всех таблиц загружаются пулом процессов.
+        """
+        processed_rows = {}
+        is_sqlite = connection.vendor == 'sqlite'
+        rows_before = {name: table.model.objects.count()
+                       for name, table in TABLES.items() if name in selected}
+        # Открытые соединения не должны попасть в дочерние процессы:
+        # пул создаёт их при отправке задач, поэтому до закрытия пула
+        # родительский процесс к базе не обращается.
+        connections.close_all()
+        with Manager() as manager, \
+                ProcessPoolExecutor(workers, initializer=django.setup) as pool:
+            write_lock = manager.Lock() if is_sqlite else None
+            for stage in STAGES:
+                names = [name for name in stage if name in selected]
+                if not names:
+                    continue
+                started = time.perf_counter()
+                futures = {}
+                for name in names:
+                    file_path = f'{self.path}/{TABLES[name].file_name}'
+                    shards = plan_shards(file_path, workers, self.batch_size)
+                    futures[name] = [
+                        pool.submit(import_shard, name, file_path, start,
+                                    stop, self.batch_size, write_lock)
+                        for start, stop in shards
+                    ]
+                for name in names:
+                    results = [future.result() for future in futures[name]]
+                    processed = sum(result[0] for result in results)
+                    skipped = sum(result[1] for result in results)
+                    processed_rows[name] = processed
+                    self.report(TABLES[name], processed, skipped,
+                                time.perf_counter() - started)
+        self.check_consistency(rows_before, processed_rows)
+
+    def check_consistency(self, rows_before, processed_rows):
+        """
+        Сверка с базой: каждая загруженная строка добавила запись
+        в таблицу, и в таблицах нет ссылок в никуда.
+        """
+        problems = []
+        for name, processed in processed_rows.items():
+            table = TABLES[name]
+            added = table.model.objects.count() - rows_before[name]
+            if added != processed:
+                problems.append(
+                    f'{table.file_name}: загружено {processed} строк, '
+                    f'в базе добавилось {added}.'
+                )
+            for field, model in table.references.items():
+                orphans = table.model.objects.exclude(**{
+                    f'{field}__in': model.objects.values('id')
+                }).count()
+                if orphans:
+                    problems.append(
+                        f'{table.file_name}: {orphans} строк с '
+                        f'несуществующим {field}.'
+                    )
+        if problems:
+            raise CommandError(
+                'Проверка целостности не пройдена:\n' + '\n'.join(problems))
+        self.stdout.write(self.style.SUCCESS('Проверка целостности пройдена.'))
+
+    def report(self, table, processed, skipped, elapsed):
+        # Пустой файл на грубом таймере может импортироваться за 0 с.
+        rate = processed / elapsed if elapsed > 0 else 0
+        message = (f'Импорт {table.label} завершён: {processed} строк '
+                   f'за {elapsed:.2f} с ({rate:.0f} строк/с).')
+        if skipped:
+            message += f' Пропущено без связанных объектов: {skipped}.'
+        peak = peak_memory_mb()
+        if peak is not None:
+            message += f' Пик памяти: {peak:.0f} МБ.'
+        self.stdout.write(self.style.SUCCESS(message))
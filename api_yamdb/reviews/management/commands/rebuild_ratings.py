@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import (
+    Count, F, IntegerField, OuterRef, Q, Subquery, Sum
+)
+from django.db.models.functions import Coalesce
+
+from api.cache import reset_versions
+from reviews.models import Review, Title
+
+
+def review_aggregate(aggregate):
+    """Подзапрос с агрегатом по отзывам текущего произведения."""
+    reviews = Review.objects.filter(
+        title=OuterRef('pk')
+    ).order_by().values('title')
+    return Coalesce(
+        Subquery(reviews.annotate(value=aggregate).values('value'),
+                 output_field=IntegerField()),
+        0
+    )
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает хранимый рейтинг произведений по отзывам.'
+
+    def handle(self, *args, **kwargs):
+        with transaction.atomic():
+            drifted = Title.objects.annotate(
+                actual_sum=review_aggregate(Sum('score')),
+                actual_count=review_aggregate(Count('id')),
+            ).filter(
+                ~Q(rating_sum=F('actual_sum'))
+                | ~Q(rating_count=F('actual_count'))
+            ).count()
+            Title.objects.update(
+                rating_sum=review_aggregate(Sum('score')),
+                rating_count=review_aggregate(Count('id')),
+            )
+            # update() не отправляет сигналы: кэшированные ответы
+            # сбрасываются вместе со всеми версиями после фиксации.
+            transaction.on_commit(reset_versions)
+        self.stdout.write(self.style.SUCCESS(
+            f'Рейтинг пересчитан, исправлено произведений: {drifted}.'))
@@ -0,0 +1,93 @@
+"""
+Полнотекстовый индекс по названию и описанию произведений.
+
+SQLite: внешняя FTS5-таблица reviews_title_fts, синхронизируемая
+триггерами (работает и для bulk_create, и для raw-запросов).
+Триггеры привязаны к reviews_title: если миграция пересоздаёт эту
+таблицу (AlterField в SQLite), их нужно создать заново.
+PostgreSQL: GIN-индексы по to_tsvector.
+"""
+from django.db import migrations
+
+SQLITE_FORWARD = (
+    """
+    CREATE VIRTUAL TABLE reviews_title_fts USING fts5(
+        name, description,
+        content='reviews_title', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER reviews_title_fts_insert AFTER INSERT ON reviews_title
+    BEGIN
+        INSERT INTO reviews_title_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER reviews_title_fts_delete AFTER DELETE ON reviews_title
+    BEGIN
+        INSERT INTO reviews_title_fts(
+            reviews_title_fts, rowid, name, description
+        ) VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER reviews_title_fts_update
+    AFTER UPDATE OF name, description ON reviews_title
+    BEGIN
+        INSERT INTO reviews_title_fts(
+            reviews_title_fts, rowid, name, description
+        ) VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO reviews_title_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    "INSERT INTO reviews_title_fts(reviews_title_fts) VALUES ('rebuild')",
+)
+SQLITE_BACKWARD = (
+    'DROP TRIGGER IF EXISTS reviews_title_fts_insert',
+    'DROP TRIGGER IF EXISTS reviews_title_fts_delete',
+    'DROP TRIGGER IF EXISTS reviews_title_fts_update',
+    'DROP TABLE IF EXISTS reviews_title_fts',
+)
+POSTGRESQL_FORWARD = (
+    """
+    CREATE INDEX reviews_title_search_idx ON reviews_title USING GIN (
+        to_tsvector('simple', coalesce(name, '') || ' '
+                    || coalesce(description, ''))
+    )
+    """,
+    """
+    CREATE INDEX reviews_title_name_search_idx ON reviews_title USING GIN (
+        to_tsvector('simple', coalesce(name, ''))
+    )
+    """,
+)
+POSTGRESQL_BACKWARD = (
+    'DROP INDEX IF EXISTS reviews_title_search_idx',
+    'DROP INDEX IF EXISTS reviews_title_name_search_idx',
+)
+
+
+def run_for_vendor(statements):
+    def run(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, ()):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_title_rating'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor({'sqlite': SQLITE_FORWARD,
+                            'postgresql': POSTGRESQL_FORWARD}),
+            run_for_vendor({'sqlite': SQLITE_BACKWARD,
+                            'postgresql': POSTGRESQL_BACKWARD}),
+        ),
+    ]
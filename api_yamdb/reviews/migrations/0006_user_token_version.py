@@ -0,0 +1,25 @@
+# Generated by Django 3.2 on 2026-10-18 04:45
+
+from django.db import migrations, models
+import reviews.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_composite_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='usermodel',
+            managers=[
+                ('objects', reviews.models.UserModelManager()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='usermodel',
+            name='token_version',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Версия прав'),
+        ),
+    ]
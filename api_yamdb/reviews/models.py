@@ -1,9 +1,10 @@
 from django.conf import settings
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db import models
-from django.db.models import UniqueConstraint
+from django.db import models, transaction
+from django.db.models import F, UniqueConstraint
+from django.dispatch import Signal
 
 from .constants import (
     MAX_LENGTH_256, MAX_LENGTH_150, MAX_LENGTH_50,
@@ -20,6 +21,39 @@ ROLE_CHOICES = [
 ]
 
 
+# Отправляется после изменения полей токена: versions — новые версии
+# прав {pk: token_version}, usernames — менялись ли имена.
+token_versions_changed = Signal()
+
+
+class UserQuerySet(models.QuerySet):
+
+    def update(self, **kwargs):
+        """
+        Массовое изменение полей токена тоже меняет версию прав:
+        иначе выданные токены сохранили бы прежние права.
+        """
+        if not set(kwargs) & set(self.model.TOKEN_FIELDS):
+            return super().update(**kwargs)
+        kwargs['token_version'] = F('token_version') + 1
+        with transaction.atomic(using=self.db):
+            # Первичные ключи берутся до изменения: фильтр может зависеть
+            # от изменяемых полей и после UPDATE не найти эти строки.
+            pks = list(self.select_for_update().values_list('pk', flat=True))
+            changed = self.model.objects.using(self.db).filter(pk__in=pks)
+            rows = super(UserQuerySet, changed).update(**kwargs)
+            versions = dict(changed.values_list('pk', 'token_version'))
+        token_versions_changed.send(
+            sender=self.model, versions=versions,
+            usernames='username' in kwargs
+        )
+        return rows
+
+
+class UserModelManager(UserManager.from_queryset(UserQuerySet)):
+    pass
+
+
 class UserModel(AbstractUser):
     """Кастомная модель пользователя."""
     role = models.CharField(
@@ -42,6 +76,51 @@ class UserModel(AbstractUser):
         validators=[validate_username],
         verbose_name='Username'
     )
+    token_version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Версия прав'
+    )
+
+    objects = UserModelManager()
+
+    # Поля, которые access-токен несёт в claims. Их изменение увеличивает
+    # token_version и отзывает выданные пользователю токены.
+    TOKEN_FIELDS = ('username', 'role', 'is_staff', 'is_superuser',
+                    'is_active')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запоминаем поля токена из БД, чтобы заметить их изменение."""
+        instance = super().from_db(db, field_names, values)
+        instance._token_fields_in_db = instance.token_state()
+        return instance
+
+    def token_state(self):
+        return tuple(self.__dict__.get(field) for field in self.TOKEN_FIELDS)
+
+    def save(self, *args, **kwargs):
+        """Увеличиваем версию прав, если изменились поля токена."""
+        state = self.token_state()
+        previous = getattr(self, '_token_fields_in_db', None)
+        if self._state.adding or previous == state:
+            super().save(*args, **kwargs)
+            self._token_fields_in_db = state
+            return
+        self.token_version = F('token_version') + 1
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'],
+                                       'token_version'}
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            self.refresh_from_db(fields=['token_version'])
+        self._token_fields_in_db = state
+        username = self.TOKEN_FIELDS.index('username')
+        token_versions_changed.send(
+            sender=type(self), versions={self.pk: self.token_version},
+            usernames=(previous is None
+                       or previous[username] != state[username])
+        )
 
     @property
     def is_admin(self):
@@ -105,6 +184,10 @@ class Title(models.Model):
         blank=True, verbose_name='Описание')
     year = models.IntegerField(verbose_name='Год публикации',
                                validators=[validate_year])
+    rating_sum = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Сумма оценок')
+    rating_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Количество оценок')
 
     class Meta:
         verbose_name = 'Произведение'
@@ -114,11 +197,40 @@ class Title(models.Model):
                 fields=['name', 'category'],
                 name='unique_title_category')
         ]
+        indexes = [
+            # Произведения категории по названию: фильтр ?category=.
+            models.Index(fields=['category', 'name', 'year'],
+                         name='title_category_name_year_idx'),
+        ]
         ordering = ['category', 'name', 'year']
 
+    # Поля рейтинга меняют только сигналы отзывов (reviews.signals).
+    RATING_FIELDS = ('rating_sum', 'rating_count')
+
     def __str__(self):
         return str(self.name)
 
+    def save(self, *args, **kwargs):
+        """
+        Не перезаписываем рейтинг значениями, загруженными вместе с
+        объектом: пока он редактировался, могли появиться новые отзывы.
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.attname for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.attname in self.__dict__
+                and field.attname not in self.RATING_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    @property
+    def rating(self):
+        """Средняя оценка по хранимым сумме и количеству оценок."""
+        if not self.rating_count:
+            return None
+        return self.rating_sum / self.rating_count
+
 
 class Review(models.Model):
     title = models.ForeignKey(Title, related_name='reviews',
@@ -144,14 +256,39 @@ class Review(models.Model):
                 name='unique_author_title_review'
             ),
         ]
+        indexes = [
+            # Отзывы произведения в порядке страниц и курсора.
+            models.Index(fields=['title', '-pub_date', '-id'],
+                         name='review_title_pub_date_idx'),
+        ]
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
         ordering = ['-pub_date']
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Запоминаем произведение и оценку из БД, чтобы пересчитать
+        рейтинг при правке.
+        """
+        instance = super().from_db(db, field_names, values)
+        instance._score_in_db = instance.__dict__.get('score')
+        instance._title_id_in_db = instance.__dict__.get('title_id')
+        return instance
+
+    def save(self, *args, **kwargs):
+        """Сохраняем отзыв и обновляем рейтинг в одной транзакции."""
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
     def clean(self):
+        """
+        Проверка для админки: её формы в Django 3.2 не проверяют
+        UniqueConstraint. API полагается на само ограничение.
+        """
         if Review.objects.filter(
-            author=self.author, title=self.title
-        ).exists():
+            author_id=self.author_id, title_id=self.title_id
+        ).exclude(pk=self.pk).exists():
             raise ValidationError('Вы уже оставили отзыв на это произведение!')
 
     def __str__(self):
@@ -173,6 +310,10 @@ class Comment(models.Model):
     )
 
     class Meta:
+        indexes = [
+            models.Index(fields=['review', '-pub_date', '-id'],
+                         name='comment_review_pub_date_idx'),
+        ]
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ['-pub_date']
@@ -0,0 +1,57 @@
+"""Поддержка хранимого рейтинга произведений в актуальном состоянии."""
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Review, Title
+
+
+def _change_rating(title_id, score_delta, count_delta):
+    Title.objects.filter(pk=title_id).update(
+        rating_sum=F('rating_sum') + score_delta,
+        rating_count=F('rating_count') + count_delta,
+    )
+
+
+@receiver(pre_save, sender=Review)
+def remember_old_score(sender, instance, raw=False, **kwargs):
+    """Подгружаем прежние произведение и оценку, если объект не из БД."""
+    if raw or instance._state.adding:
+        return
+    if (getattr(instance, '_score_in_db', None) is None
+            or getattr(instance, '_title_id_in_db', None) is None):
+        instance._title_id_in_db, instance._score_in_db = (
+            Review.objects.filter(pk=instance.pk).values_list(
+                'title_id', 'score'
+            ).first() or (None, None)
+        )
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, raw=False,
+                          update_fields=None, **kwargs):
+    if raw:
+        return
+    if created:
+        _change_rating(instance.title_id, instance.score, 1)
+        instance._title_id_in_db = instance.title_id
+        instance._score_in_db = instance.score
+        return
+    old_title_id, old_score = instance._title_id_in_db, instance._score_in_db
+    saved = {'title', 'score'} if update_fields is None \
+        else set(update_fields)
+    title_id = instance.title_id if {'title', 'title_id'} & saved \
+        else old_title_id
+    score = instance.score if 'score' in saved else old_score
+    if title_id != old_title_id:
+        # Отзыв перенесён: оценка переходит к другому произведению.
+        _change_rating(old_title_id, -old_score, -1)
+        _change_rating(title_id, score, 1)
+    elif score != old_score:
+        _change_rating(title_id, score - old_score, 0)
+    instance._title_id_in_db, instance._score_in_db = title_id, score
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    _change_rating(instance.title_id, -instance.score, -1)
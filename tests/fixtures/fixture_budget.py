@@ -0,0 +1,79 @@
+import time
+from contextlib import contextmanager
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# Бюджеты на один запрос к эндпоинту: (SQL-запросов, миллисекунд).
+# Запросы на чтение считаются после прогрева кэша количества записей.
+# Бюджеты изменения и удаления включают запрос пользователя по токену
+# фикстур, в котором нет claims (api.authentication).
+# Число запросов не должно зависеть от размера страницы, время
+# задано с запасом и ловит только грубые регрессии.
+BUDGETS = {
+    'users-list': (3, 300),
+    'users-detail': (2, 300),
+    'users-me': (1, 300),
+    'categories-list': (1, 300),
+    'genres-list': (1, 300),
+    'titles-list': (2, 300),
+    'titles-detail': (2, 300),
+    'titles-create': (10, 300),
+    'titles-update': (6, 300),
+    'titles-delete': (6, 300),
+    'reviews-list': (2, 300),
+    'reviews-detail': (1, 300),
+    'reviews-create': (5, 300),
+    'reviews-update': (5, 300),
+    'reviews-delete': (6, 300),
+    'comments-list': (2, 300),
+    'comments-detail': (1, 300),
+    'comments-create': (3, 300),
+    'comments-update': (3, 300),
+    'comments-delete': (4, 300),
+    'autocomplete': (0, 300),
+    'signup': (4, 300),
+    'token': (2, 300),
+}
+
+
+def format_queries(queries):
+    return '\n'.join(
+        f'{number}. {query["sql"]}'
+        for number, query in enumerate(queries, 1)
+    )
+
+
+@contextmanager
+def within_budget(name, queries=None, ms=None):
+    """
+    Проверяет, что блок уложился в бюджет эндпоинта name. Явные queries
+    и ms переопределяют значения из BUDGETS. При превышении тест падает
+    со списком выполненных SQL-запросов.
+    """
+    budget_queries, budget_ms = BUDGETS[name]
+    queries = budget_queries if queries is None else queries
+    ms = budget_ms if ms is None else ms
+    with CaptureQueriesContext(connection) as captured:
+        started = time.perf_counter()
+        yield captured
+        elapsed = (time.perf_counter() - started) * 1000
+    if len(captured) > queries:
+        pytest.fail(
+            f'{name}: выполнено {len(captured)} SQL-запросов при бюджете '
+            f'{queries}:\n{format_queries(captured.captured_queries)}',
+            pytrace=False
+        )
+    if elapsed > ms:
+        pytest.fail(
+            f'{name}: запрос занял {elapsed:.0f} мс при бюджете {ms} мс. '
+            f'SQL-запросы:\n{format_queries(captured.captured_queries)}',
+            pytrace=False
+        )
+
+
+@pytest.fixture
+def budget():
+    """Контекстный менеджер within_budget для проверок в тестах."""
+    return within_budget
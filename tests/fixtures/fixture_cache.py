@@ -0,0 +1,18 @@
+import pytest
+from django.core.cache import cache, caches
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(settings, tmp_path_factory):
+    """
+    Кэш живёт дольше тестовой БД, поэтому очищаем его перед тестом.
+    Версии хранятся в своём каталоге, а не в кэше запущенного сервера.
+    """
+    alias = settings.VERSION_CACHE_ALIAS
+    settings.CACHES = {**settings.CACHES, alias: {
+        **settings.CACHES[alias],
+        'LOCATION': str(tmp_path_factory.getbasetemp() / 'versions'),
+    }}
+    cache.clear()
+    caches[alias].clear()
+    yield
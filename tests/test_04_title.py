@@ -193,11 +193,13 @@ class Test04TitleAPI:
             'произведения.'
         )
 
-    def test_03_titles_detail(self, client, admin_client):
+    def test_03_titles_detail(self, client, admin_client, budget):
         titles, categories, _ = create_titles(admin_client)
-        response = client.get(
-            self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        title_url = self.TITLES_DETAIL_URL_TEMPLATE.format(
+            title_id=titles[0]['id']
         )
+        with budget('titles-detail'):
+            response = client.get(title_url)
         assert response.status_code != HTTPStatus.NOT_FOUND, (
             f'Эндпоинт `{self.TITLES_DETAIL_URL_TEMPLATE}` не найден, '
             'проверьте настройки в *urls.py*.'
@@ -228,10 +230,8 @@ class Test04TitleAPI:
             'name': 'Новое название',
             'category': categories[1]['slug']
         }
-        response = admin_client.patch(
-            self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=titles[0]['id']),
-            data=update_data
-        )
+        with budget('titles-update'):
+            response = admin_client.patch(title_url, data=update_data)
         assert response.status_code == HTTPStatus.OK, (
             'Проверьте, что PATCH-запрос администратора к '
             f'`{self.TITLES_DETAIL_URL_TEMPLATE}` возвращает ответ со '
@@ -259,9 +259,8 @@ class Test04TitleAPI:
             'поля `name` произведения.'
         )
 
-        response = admin_client.delete(
-            self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=titles[0]['id']),
-        )
+        with budget('titles-delete'):
+            response = admin_client.delete(title_url)
         assert response.status_code == HTTPStatus.NO_CONTENT, (
             'Проверьте, что DELETE-запрос администратора к '
             f'`{self.TITLES_DETAIL_URL_TEMPLATE}` возвращает ответ со '
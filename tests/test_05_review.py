@@ -257,7 +257,8 @@ class Test05ReviewAPI:
         )
 
     def test_04_review_detail_user(self, admin_client, admin, user,
-                                   user_client, moderator, moderator_client):
+                                   user_client, moderator, moderator_client,
+                                   budget):
         author_map = {
             admin: admin_client,
             user: user_client,
@@ -272,7 +273,8 @@ class Test05ReviewAPI:
             title_id=titles[0]['id'], review_id=reviews[1]['id']
         )
 
-        response = user_client.patch(user_review_url, data=new_data)
+        with budget('reviews-update'):
+            response = user_client.patch(user_review_url, data=new_data)
         assert response.status_code == HTTPStatus.OK, (
             'Проверьте, что PATCH-запрос пользователя с ролью `user` к его '
             f'собственному отзыву через `{self.REVIEW_DETAIL_URL_TEMPLATE}` '
@@ -286,7 +288,9 @@ class Test05ReviewAPI:
             'данные.'
         )
 
-        response = user_client.get(user_review_url)
+        # Токен фикстуры без claims: +1 запрос пользователя.
+        with budget('reviews-detail', queries=2):
+            response = user_client.get(user_review_url)
         assert response.status_code == HTTPStatus.OK, (
             'Проверьте, что GET-запрос авторизованного пользователя к '
             f'{self.REVIEW_DETAIL_URL_TEMPLATE} возвращает ответ со статусом '
@@ -318,7 +322,8 @@ class Test05ReviewAPI:
             'возвращает ответ со статусом 403.'
         )
 
-        response = user_client.delete(user_review_url)
+        with budget('reviews-delete'):
+            response = user_client.delete(user_review_url)
         assert response.status_code == HTTPStatus.NO_CONTENT, (
             'Проверьте, что DELETE-запрос пользователя с ролью `user` к его '
             f'собственному отзыву через `{self.REVIEW_DETAIL_URL_TEMPLATE}` '
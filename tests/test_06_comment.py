@@ -166,7 +166,7 @@ class Test06CommentAPI:
     def test_04_comment_detail__user_patch_delete(self, admin_client, admin,
                                                   user_client, user,
                                                   moderator_client,
-                                                  moderator):
+                                                  moderator, budget):
         author_map = {
             admin: admin_client,
             user: user_client,
@@ -180,7 +180,8 @@ class Test06CommentAPI:
             comment_id=comments[1]['id']
         )
         new_data = {'text': 'Updated'}
-        response = user_client.patch(second_comment_url, data=new_data)
+        with budget('comments-update'):
+            response = user_client.patch(second_comment_url, data=new_data)
         assert response.status_code == HTTPStatus.OK, (
             'Проверьте, что PATCH-запрос авторизованного пользователя к '
             'его собственному комментарию через '
@@ -196,7 +197,9 @@ class Test06CommentAPI:
             'некорректное значение.'
         )
 
-        response = user_client.get(second_comment_url)
+        # Токен фикстуры без claims: +1 запрос пользователя.
+        with budget('comments-detail', queries=2):
+            response = user_client.get(second_comment_url)
         assert response.status_code == HTTPStatus.OK, (
             'Проверьте, что GET-запрос авторизованного пользователя к '
             f'`{self.COMMENT_DETAIL_URL_TEMPLATE}` возвращает ответ со '
@@ -221,7 +224,8 @@ class Test06CommentAPI:
             'возвращает ответ со статусом 403.'
         )
 
-        response = user_client.delete(second_comment_url)
+        with budget('comments-delete'):
+            response = user_client.delete(second_comment_url)
         assert response.status_code == HTTPStatus.NO_CONTENT, (
             'Проверьте, что DELETE-запрос пользователя с ролью `user` к '
             'его собственному комментарию через '
@@ -0,0 +1,105 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Category, Review, Title
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08Rating:
+
+    TITLE_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+    REVIEW_DETAIL_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/'
+    )
+
+    def get_rating(self, client, title_id):
+        response = client.get(
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=title_id)
+        )
+        assert response.status_code == HTTPStatus.OK
+        return response.json()['rating']
+
+    def test_01_rating_follows_reviews(self, admin_client, user_client,
+                                       moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_single_review(user_client, title_id, 'text', 4)
+        response = create_single_review(
+            moderator_client, title_id, 'text', 8
+        )
+        review_id = response.json()['id']
+        assert self.get_rating(admin_client, title_id) == 6, (
+            'Проверьте, что рейтинг произведения обновляется при создании '
+            'отзыва.'
+        )
+
+        admin_client.patch(
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=title_id, review_id=review_id
+            ),
+            data={'score': 10}
+        )
+        assert self.get_rating(admin_client, title_id) == 7, (
+            'Проверьте, что рейтинг произведения обновляется при изменении '
+            'оценки в отзыве.'
+        )
+
+        admin_client.delete(
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=title_id, review_id=review_id
+            )
+        )
+        assert self.get_rating(admin_client, title_id) == 4, (
+            'Проверьте, что рейтинг произведения обновляется при удалении '
+            'отзыва.'
+        )
+
+    def test_02_rebuild_ratings(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(user_client, titles[0]['id'], 'text', 5)
+        Title.objects.update(rating_sum=0, rating_count=0)
+
+        call_command('rebuild_ratings')
+
+        title = Title.objects.get(id=titles[0]['id'])
+        assert (title.rating_sum, title.rating_count) == (5, 1), (
+            'Проверьте, что команда `rebuild_ratings` восстанавливает '
+            'рейтинг по отзывам.'
+        )
+
+    def test_03_title_save_keeps_rating(self, user):
+        category = Category.objects.create(name='Фильм', slug='films')
+        title = Title.objects.create(name='Первое', year=2000,
+                                     category=category)
+        Review.objects.create(title=title, author=user, text='text',
+                              score=5)
+        title.description = 'Новое описание'
+        title.save()
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (5, 1), (
+            'Проверьте, что сохранение произведения не перезаписывает '
+            'рейтинг значениями, загруженными до появления отзыва.'
+        )
+
+    def test_04_review_moved(self, admin_client, user):
+        category = Category.objects.create(name='Фильм', slug='films')
+        first, second = (
+            Title.objects.create(name=name, year=2000, category=category)
+            for name in ('Первое', 'Второе')
+        )
+        review = Review.objects.create(title=first, author=user,
+                                       text='text', score=5)
+        assert self.get_rating(admin_client, first.id) == 5
+        review.title = second
+        review.save()
+        assert self.get_rating(admin_client, first.id) is None, (
+            'Проверьте, что перенос отзыва к другому произведению убирает '
+            'его оценку из рейтинга прежнего.'
+        )
+        assert self.get_rating(admin_client, second.id) == 5, (
+            'Проверьте, что перенос отзыва к другому произведению '
+            'добавляет его оценку в рейтинг нового.'
+        )
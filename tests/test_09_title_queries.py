@@ -0,0 +1,44 @@
+import pytest
+
+from reviews.models import Category, Genre, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09TitleQueries:
+
+    TITLES_URL = '/api/v1/titles/'
+    TITLES_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+
+    def create_titles(self, count):
+        category = Category.objects.create(name='Фильм', slug='films')
+        genres = [
+            Genre.objects.create(name=f'Жанр {idx}', slug=f'genre-{idx}')
+            for idx in range(3)
+        ]
+        titles = []
+        for idx in range(count):
+            title = Title.objects.create(
+                name=f'Произведение {idx}', year=2000, category=category
+            )
+            title.genre.set(genres)
+            titles.append(title)
+        return titles
+
+    @pytest.mark.parametrize('count', (1, 10))
+    def test_01_list_query_count(self, client, count,
+                                 django_assert_num_queries):
+        self.create_titles(count)
+        with django_assert_num_queries(3):
+            response = client.get(self.TITLES_URL)
+        assert len(response.json()['results']) == count, (
+            f'Проверьте, что GET-запрос к `{self.TITLES_URL}` возвращает '
+            'все произведения страницы.'
+        )
+
+    def test_02_detail_query_count(self, client, django_assert_num_queries):
+        title = self.create_titles(1)[0]
+        with django_assert_num_queries(2):
+            response = client.get(
+                self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=title.id)
+            )
+        assert len(response.json()['genre']) == 3
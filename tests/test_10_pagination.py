@@ -0,0 +1,165 @@
+from base64 import b64decode, b64encode
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlencode, urlparse
+
+import pytest
+from django.core.checks import run_checks
+from django.db import transaction
+from django.test import override_settings
+
+from reviews.models import Category, Review, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10Pagination:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def collect_pages(self, client, url):
+        ids, pages = [], 0
+        while url:
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.OK
+            data = response.json()
+            assert 'count' not in data, (
+                'Проверьте, что в режиме курсорной пагинации ответ не '
+                'содержит ключ `count`.'
+            )
+            ids.extend(title['id'] for title in data['results'])
+            url = data['next']
+            pages += 1
+        return ids, pages
+
+    def test_01_cursor_walks_all_titles(self, client):
+        categories = [
+            Category.objects.create(name='Фильм', slug='films'),
+            Category.objects.create(name='Книги', slug='books'),
+        ]
+        for idx in range(12):
+            for category in categories:
+                Title.objects.create(
+                    name=f'Произведение {idx}', year=2000, category=category
+                )
+
+        ids, pages = self.collect_pages(client, f'{self.TITLES_URL}?cursor=')
+
+        assert pages == 3
+        assert sorted(ids) == sorted(
+            Title.objects.values_list('id', flat=True)
+        ), (
+            f'Проверьте, что курсорная пагинация `{self.TITLES_URL}?cursor=` '
+            'возвращает каждое произведение ровно один раз, в том числе при '
+            'совпадающих названиях.'
+        )
+
+    def test_02_page_number_by_default(self, client):
+        response = client.get(self.TITLES_URL)
+        assert 'count' in response.json(), (
+            'Проверьте, что без параметра `cursor` используется '
+            'постраничная пагинация.'
+        )
+
+    def test_03_count_is_cached(self, client, django_assert_num_queries):
+        category = Category.objects.create(name='Фильм', slug='films')
+        Title.objects.create(name='Первое', year=2000, category=category)
+        client.get(self.TITLES_URL)
+
+        # Другой номер страницы — мимо кэша ответов, но тот же COUNT.
+        with django_assert_num_queries(2):
+            response = client.get(self.TITLES_URL, {'page': 1})
+        assert response.json()['count'] == 1, (
+            'Проверьте, что повторный GET-запрос к '
+            f'`{self.TITLES_URL}` берёт количество объектов из кэша.'
+        )
+
+        Title.objects.create(name='Второе', year=2000, category=category)
+        response = client.get(self.TITLES_URL)
+        assert response.json()['count'] == 2, (
+            'Проверьте, что кэш количества объектов сбрасывается при '
+            'создании произведения.'
+        )
+        response = client.get(f'{self.TITLES_URL}?year=1999')
+        assert response.json()['count'] == 0, (
+            'Проверьте, что количество объектов кэшируется отдельно для '
+            'разных параметров фильтрации.'
+        )
+
+    def test_04_keyset_with_ties(self, client):
+        category = Category.objects.create(name='Фильм', slug='films')
+        for idx in range(25):
+            Title.objects.create(name=f'Произведение {idx}',
+                                 year=2000 + idx % 2, category=category)
+        url = f'{self.TITLES_URL}?ordering=-year&cursor='
+        ids, _ = self.collect_pages(client, url)
+        expected = list(Title.objects.order_by('-year', '-id').values_list(
+            'id', flat=True))
+        assert ids == expected, (
+            'Проверьте, что курсорная пагинация с сортировкой по полю с '
+            'повторяющимися значениями возвращает каждую запись ровно '
+            'один раз в порядке (поле, id).'
+        )
+
+        data = client.get(url).json()
+        cursor = parse_qs(urlparse(data['next']).query)['cursor'][0]
+        tokens = parse_qs(b64decode(cursor).decode())
+        assert 'o' not in tokens, (
+            'Проверьте, что курсор задаёт позицию значениями полей '
+            'сортировки и id, без смещения.'
+        )
+        last = data['results'][-1]
+        assert tokens['p'] == [f'[{last["year"]}, {last["id"]}]']
+
+        back = client.get(client.get(data['next']).json()['previous']).json()
+        assert [title['id'] for title in back['results']] == [
+            title['id'] for title in data['results']
+        ], 'Проверьте, что ссылка `previous` возвращает на прежнюю страницу.'
+
+    def test_05_count_reset_on_commit(self, client, user, moderator,
+                                      admin):
+        category = Category.objects.create(name='Фильм', slug='films')
+        title = Title.objects.create(name='Первое', year=2000,
+                                     category=category)
+        Review.objects.create(title=title, author=user, text='Отзыв',
+                              score=5)
+        url = f'{self.TITLES_URL}{title.id}/reviews/'
+        assert client.get(url).json()['count'] == 1
+
+        with transaction.atomic():
+            Review.objects.create(title=title, author=moderator,
+                                  text='Отзыв', score=5)
+            transaction.set_rollback(True)
+        assert client.get(url, {'page': 1}).json()['count'] == 1
+
+        with transaction.atomic():
+            Review.objects.create(title=title, author=admin, text='Отзыв',
+                                  score=5)
+            response = client.get(url, {'page': 1})
+            assert response.json()['count'] == 1, (
+                'Проверьте, что версия для кэша количества объектов '
+                'сбрасывается только после фиксации транзакции.'
+            )
+        assert client.get(url, {'page': 1}).json()['count'] == 2
+
+    def test_06_local_version_cache_rejected(self, settings):
+        caches = dict(settings.CACHES)
+        caches[settings.VERSION_CACHE_ALIAS] = {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+        with override_settings(CACHES=caches):
+            errors = [error.id for error in run_checks()]
+        assert 'api.E001' in errors, (
+            'Проверьте, что локальный кэш версий моделей отклоняется '
+            'проверкой api.E001.'
+        )
+
+    def test_07_malformed_cursor(self, client):
+        category = Category.objects.create(name='Фильм', slug='films')
+        Title.objects.create(name='Первое', year=2000, category=category)
+        for position in ('["a", "x"]', '[[2000], 1]', '[2000]'):
+            cursor = b64encode(urlencode({'p': position}).encode()).decode()
+            response = client.get(self.TITLES_URL,
+                                  {'ordering': 'year', 'cursor': cursor})
+            assert response.status_code == HTTPStatus.NOT_FOUND, (
+                'Проверьте, что курсор с позицией неверного типа или длины '
+                'отклоняется ответом 404.'
+            )
@@ -0,0 +1,63 @@
+from http import HTTPStatus
+
+import pytest
+
+from reviews.models import Category, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11Search:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    @pytest.fixture
+    def titles(self):
+        category = Category.objects.create(name='Фильм', slug='films')
+        return [
+            Title.objects.create(
+                name='Мост через реку Квай', year=1957, category=category,
+                description='Военная драма.'
+            ),
+            Title.objects.create(
+                name='Мостовая', year=2000, category=category,
+                description='Про мосты и мост через реку.'
+            ),
+            Title.objects.create(
+                name='Крёстный отец', year=1972, category=category,
+                description='Семейная сага.'
+            ),
+        ]
+
+    def get_ids(self, client, query):
+        response = client.get(f'{self.TITLES_URL}?{query}')
+        assert response.status_code == HTTPStatus.OK
+        return [title['id'] for title in response.json()['results']]
+
+    def test_01_search_by_words(self, client, titles):
+        assert self.get_ids(client, 'search=мост реку') == [
+            titles[1].id, titles[0].id
+        ], (
+            f'Проверьте, что поиск `{self.TITLES_URL}?search=` находит '
+            'произведения по началам слов в названии и описании и '
+            'сортирует их по релевантности.'
+        )
+        assert self.get_ids(client, 'search=сага') == [titles[2].id]
+
+    def test_02_filter_by_name(self, client, titles):
+        assert sorted(self.get_ids(client, 'name=мост')) == [
+            titles[0].id, titles[1].id
+        ], (
+            f'Проверьте, что фильтр `{self.TITLES_URL}?name=` ищет только '
+            'по названию произведения.'
+        )
+
+    def test_03_index_follows_changes(self, client, titles):
+        titles[2].name = 'Крёстная мать'
+        titles[2].save()
+        titles[0].delete()
+        assert self.get_ids(client, 'name=мать') == [titles[2].id]
+        assert self.get_ids(client, 'name=отец') == []
+        assert self.get_ids(client, 'name=квай') == [], (
+            'Проверьте, что поисковый индекс обновляется при изменении и '
+            'удалении произведений.'
+        )
@@ -0,0 +1,110 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import transaction
+
+from api.autocomplete import INDEXES
+from api.cache import incr_version
+from reviews.models import Category, Genre, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12Autocomplete:
+
+    AUTOCOMPLETE_URL = '/api/v1/autocomplete/'
+
+    @pytest.fixture
+    def objects(self):
+        category = Category.objects.create(name='Фильм', slug='films')
+        genre = Genre.objects.create(name='Фэнтези', slug='fantasy')
+        titles = [
+            Title.objects.create(name=name, year=2000, category=category)
+            for name in ('Фиалка', 'финал', 'Фильм про фильм', 'Афина')
+        ]
+        return category, genre, titles
+
+    def test_01_prefix_search(self, client, objects,
+                              django_assert_num_queries):
+        category, genre, titles = objects
+        response = client.get(f'{self.AUTOCOMPLETE_URL}?q=фи')
+        assert response.status_code == HTTPStatus.OK, (
+            f'Эндпоинт `{self.AUTOCOMPLETE_URL}` не найден или недоступен '
+            'неавторизованному пользователю.'
+        )
+        assert response.json() == {
+            'titles': [
+                {'id': titles[0].id, 'name': 'Фиалка'},
+                {'id': titles[2].id, 'name': 'Фильм про фильм'},
+                {'id': titles[1].id, 'name': 'финал'},
+            ],
+            'genres': [],
+            'categories': [
+                {'id': category.id, 'name': 'Фильм', 'slug': 'films'}
+            ],
+        }, (
+            'Проверьте, что автодополнение находит объекты по началу '
+            'названия без учёта регистра.'
+        )
+        with django_assert_num_queries(0):
+            response = client.get(
+                f'{self.AUTOCOMPLETE_URL}?q=ф&types=genres&limit=1'
+            )
+        assert response.json() == {'genres': [
+            {'id': genre.id, 'name': 'Фэнтези', 'slug': 'fantasy'}
+        ]}
+
+    def test_02_index_follows_changes(self, client, objects):
+        _, _, titles = objects
+        client.get(f'{self.AUTOCOMPLETE_URL}?q=фи')
+        titles[0].name = 'Лиана'
+        titles[0].save()
+        titles[1].delete()
+
+        response = client.get(f'{self.AUTOCOMPLETE_URL}?q=&types=titles')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        response = client.get(f'{self.AUTOCOMPLETE_URL}?q=фи&types=titles')
+        assert response.json() == {'titles': [
+            {'id': titles[2].id, 'name': 'Фильм про фильм'}
+        ]}, (
+            'Проверьте, что индекс автодополнения обновляется при изменении '
+            'и удалении объектов.'
+        )
+        response = client.get(f'{self.AUTOCOMPLETE_URL}?q=ли&types=titles')
+        assert response.json() == {'titles': [
+            {'id': titles[0].id, 'name': 'Лиана'}
+        ]}
+
+    def test_03_rollback_keeps_index(self, client, objects,
+                                     django_assert_num_queries):
+        category, _, _ = objects
+        client.get(f'{self.AUTOCOMPLETE_URL}?q=фи&types=titles')
+        with transaction.atomic():
+            Title.objects.create(name='Фантом', year=2000,
+                                 category=category)
+            transaction.set_rollback(True)
+        with django_assert_num_queries(0):
+            response = client.get(
+                f'{self.AUTOCOMPLETE_URL}?q=фа&types=titles'
+            )
+        assert response.json() == {'titles': []}, (
+            'Проверьте, что индекс автодополнения обновляется только после '
+            'фиксации транзакции и не хранит откаченные объекты.'
+        )
+
+    def test_04_change_from_other_process(self, client, objects):
+        category, _, titles = objects
+        client.get(f'{self.AUTOCOMPLETE_URL}?q=фи&types=titles')
+        # Изменение другого процесса: строка в базе и новая версия индекса.
+        Title.objects.bulk_create([
+            Title(name='Фантом', year=2000, category=category)
+        ])
+        incr_version(INDEXES['titles'].version_name)
+        titles[3].name = 'Фабула'
+        titles[3].save()
+        response = client.get(f'{self.AUTOCOMPLETE_URL}?q=фа&types=titles')
+        assert [title['name'] for title in response.json()['titles']] == [
+            'Фабула', 'Фантом'
+        ], (
+            'Проверьте, что индекс автодополнения перестраивается, если '
+            'между его обновлениями версию изменил другой процесс.'
+        )
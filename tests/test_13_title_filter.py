@@ -0,0 +1,70 @@
+import pytest
+
+from reviews.models import Category, Genre, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13TitleFilter:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    @pytest.fixture
+    def titles(self):
+        films = Category.objects.create(name='Фильм', slug='films')
+        books = Category.objects.create(name='Книги', slug='books')
+        drama = Genre.objects.create(name='Драма', slug='drama')
+        comedy = Genre.objects.create(name='Комедия', slug='comedy')
+        dramedy = Genre.objects.create(name='Драмеди', slug='drama-comedy')
+        both = Title.objects.create(name='Обе', year=2000, category=films)
+        both.genre.set([drama, comedy])
+        only_drama = Title.objects.create(
+            name='Драма', year=2000, category=books
+        )
+        only_drama.genre.set([drama])
+        mixed = Title.objects.create(name='Смесь', year=2000, category=books)
+        mixed.genre.set([dramedy])
+        return both, only_drama, mixed
+
+    def get_ids(self, client, query):
+        response = client.get(f'{self.TITLES_URL}?{query}')
+        data = response.json()
+        ids = sorted(title['id'] for title in data['results'])
+        assert data['count'] == len(ids), (
+            'Проверьте, что при фильтрации произведения не дублируются.'
+        )
+        return ids
+
+    def test_01_exact_genre(self, client, titles):
+        both, only_drama, mixed = titles
+        assert self.get_ids(client, 'genre=drama') == sorted(
+            [both.id, only_drama.id]
+        ), (
+            f'Проверьте, что фильтр `{self.TITLES_URL}?genre=` ищет жанр по '
+            'точному совпадению слага.'
+        )
+        assert self.get_ids(client, 'genre=drama,comedy') == sorted(
+            [both.id, only_drama.id]
+        ), (
+            f'Проверьте, что фильтр `{self.TITLES_URL}?genre=` принимает '
+            'несколько слагов через запятую.'
+        )
+        assert self.get_ids(client, 'genre=unknown') == []
+
+    def test_02_exact_category(self, client, titles):
+        both, only_drama, mixed = titles
+        assert self.get_ids(client, 'category=books') == sorted(
+            [only_drama.id, mixed.id]
+        )
+        assert self.get_ids(client, 'category=films,books') == sorted(
+            [both.id, only_drama.id, mixed.id]
+        )
+        assert self.get_ids(client, 'category=book') == []
+
+    def test_03_icontains_opt_in(self, client, titles):
+        assert self.get_ids(client, 'genre__icontains=drama') == sorted(
+            title.id for title in titles
+        ), (
+            f'Проверьте, что фильтр `{self.TITLES_URL}?genre__icontains=` '
+            'ищет жанр по части слага.'
+        )
+        assert len(self.get_ids(client, 'category__icontains=oo')) == 2
@@ -0,0 +1,91 @@
+import csv
+import filecmp
+import os
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from reviews.models import Comment, Review, Title
+
+OPTIONS = {
+    'titles': 50, 'users': 20, 'reviews': 400, 'comments': 600,
+    'seed': 7,
+}
+
+
+def generate(path):
+    call_command('generate_data', path=path, stdout=StringIO(), **OPTIONS)
+
+
+def read_csv(path, file_name):
+    with open(os.path.join(path, file_name), encoding='utf-8') as file:
+        return list(csv.DictReader(file))
+
+
+class Test14GenerateData:
+
+    def test_01_deterministic(self, tmp_path):
+        first, second = tmp_path / 'first', tmp_path / 'second'
+        generate(first)
+        generate(second)
+        names = sorted(os.listdir(first))
+        _, mismatch, errors = filecmp.cmpfiles(first, second, names,
+                                               shallow=False)
+        assert not mismatch and not errors, (
+            'Проверьте, что при одинаковом --seed генерируются одинаковые '
+            'файлы.'
+        )
+
+    def test_02_sizes_and_unique_reviews(self, tmp_path):
+        generate(tmp_path)
+        reviews = read_csv(tmp_path, 'review.csv')
+        assert len(reviews) == OPTIONS['reviews'], (
+            'Проверьте, что генерируется заданное число отзывов.'
+        )
+        assert len(read_csv(tmp_path, 'comments.csv')) == (
+            OPTIONS['comments']
+        ), 'Проверьте, что генерируется заданное число комментариев.'
+        pairs = {(row['title_id'], row['author']) for row in reviews}
+        assert len(pairs) == len(reviews), (
+            'Проверьте, что пользователь оставляет не больше одного отзыва '
+            'на произведение.'
+        )
+        per_title = [
+            sum(row['title_id'] == str(pk) for row in reviews)
+            for pk in (1, OPTIONS['titles'])
+        ]
+        assert per_title[0] > per_title[1], (
+            'Проверьте, что популярность произведений убывает по Ципфу.'
+        )
+
+    def test_03_refuses_to_overwrite(self, tmp_path):
+        generate(tmp_path)
+        with pytest.raises(CommandError):
+            generate(tmp_path)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_import(self, tmp_path):
+        generate(tmp_path)
+        call_command('import_all', path=tmp_path, stdout=StringIO())
+        assert Title.objects.count() == len(read_csv(tmp_path, 'titles.csv'))
+        assert Review.objects.count() == OPTIONS['reviews'], (
+            'Проверьте, что сгенерированные отзывы загружаются import_all.'
+        )
+        assert Comment.objects.count() == OPTIONS['comments'], (
+            'Проверьте, что сгенерированные комментарии загружаются '
+            'import_all.'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_unique_title_names(self, tmp_path):
+        call_command('generate_data', path=tmp_path, stdout=StringIO(),
+                     **{**OPTIONS, 'titles': 3000, 'categories': 1})
+        titles = read_csv(tmp_path, 'titles.csv')
+        call_command('import_all', path=tmp_path, stdout=StringIO(),
+                     only=['categories', 'titles'])
+        assert Title.objects.count() == len(titles) == 3000, (
+            'Проверьте, что сгенерированные названия произведений не '
+            'повторяются в одной категории и все произведения загружаются.'
+        )
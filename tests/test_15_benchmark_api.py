@@ -0,0 +1,73 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from reviews.models import Category
+
+OPTIONS = {
+    'titles': 30, 'users': 20, 'reviews': 100, 'comments': 100,
+    'requests': 5, 'warmup': 1, 'no_test_db': True,
+}
+ENDPOINTS = (
+    'titles-list', 'titles-retrieve', 'reviews-list', 'comments-list',
+    'reviews-create', 'signup', 'token',
+)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15BenchmarkApi:
+
+    def test_01_report(self, tmp_path):
+        output = tmp_path / 'report.json'
+        call_command('benchmark_api', output=output, stdout=StringIO(),
+                     **OPTIONS)
+        with open(output, encoding='utf-8') as file:
+            report = json.load(file)
+        assert tuple(report['endpoints']) == ENDPOINTS, (
+            'Проверьте, что отчёт содержит все замеряемые эндпоинты.'
+        )
+        for name, result in report['endpoints'].items():
+            assert result['errors'] == 0, (
+                f'Проверьте, что запросы к {name} в бенчмарке успешны.'
+            )
+            assert result['count'] == OPTIONS['requests']
+            assert result['p50_ms'] <= result['p95_ms'] <= result['max_ms']
+            assert result['queries_max'] > 0
+            assert result['cache_hits'] == 0, (
+                'Проверьте, что по умолчанию бенчмарк замеряет запросы '
+                'мимо кэша ответов.'
+            )
+
+    def test_02_compare(self, tmp_path):
+        first = tmp_path / 'first.json'
+        call_command('benchmark_api', output=first, stdout=StringIO(),
+                     **OPTIONS)
+        call_command('flush', interactive=False)
+        out = StringIO()
+        call_command('benchmark_api', output=tmp_path / 'second.json',
+                     compare=first, stdout=out, **OPTIONS)
+        assert 'p50' in out.getvalue() and 'запросов было' in out.getvalue(), (
+            'Проверьте, что с --compare выводится сравнение с прошлым '
+            'отчётом.'
+        )
+
+    def test_03_response_cache(self, tmp_path):
+        output = tmp_path / 'report.json'
+        call_command('benchmark_api', output=output, stdout=StringIO(),
+                     response_cache=True, **OPTIONS)
+        with open(output, encoding='utf-8') as file:
+            report = json.load(file)
+        assert report['response_cache'] is True
+        assert report['endpoints']['titles-list']['cache_hits'] > 0, (
+            'Проверьте, что с --response-cache попадания в кэш ответов '
+            'учитываются в отчёте.'
+        )
+
+    def test_04_no_test_db_requires_empty_database(self, tmp_path):
+        Category.objects.create(name='Фильм', slug='films')
+        with pytest.raises(CommandError, match='только для пустой базы'):
+            call_command('benchmark_api', output=tmp_path / 'report.json',
+                         stdout=StringIO(), **OPTIONS)
@@ -0,0 +1,160 @@
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+
+from api.pagination import OptionalCursorPagination
+from reviews.models import Category, Comment, Genre, Review, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16Budgets:
+    """Число SQL-запросов эндпоинтов не растёт с размером страницы."""
+
+    @pytest.fixture
+    def data(self, django_user_model, count):
+        category = Category.objects.create(name='Фильм', slug='films')
+        genres = [
+            Genre.objects.create(name=f'Жанр {idx}', slug=f'genre-{idx}')
+            for idx in range(count)
+        ]
+        titles = []
+        for idx in range(count):
+            title = Title.objects.create(
+                name=f'Произведение {idx}', year=2000, category=category
+            )
+            title.genre.set(genres[:3])
+            titles.append(title)
+        authors = [
+            django_user_model.objects.create_user(
+                username=f'author{idx}', email=f'author{idx}@yamdb.fake'
+            )
+            for idx in range(count)
+        ]
+        reviews = [
+            Review.objects.create(title=titles[0], author=author,
+                                  text='Отзыв', score=5)
+            for author in authors
+        ]
+        for author in authors:
+            Comment.objects.create(review=reviews[0], author=author,
+                                   text='Комментарий')
+        return titles[0], reviews[0], authors[0]
+
+    @pytest.mark.parametrize('count', (1, 10))
+    def test_01_public_lists(self, client, data, budget):
+        title, review, _ = data
+        urls = {
+            'categories-list': '/api/v1/categories/',
+            'genres-list': '/api/v1/genres/',
+            'titles-list': '/api/v1/titles/',
+            'titles-detail': f'/api/v1/titles/{title.id}/',
+            'reviews-list': f'/api/v1/titles/{title.id}/reviews/',
+            'reviews-detail': (
+                f'/api/v1/titles/{title.id}/reviews/{review.id}/'
+            ),
+            'comments-list': (
+                f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+            ),
+            'comments-detail': (
+                f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+                f'{review.comments.first().id}/'
+            ),
+            'autocomplete': '/api/v1/autocomplete/?q=произв',
+        }
+        for name, url in urls.items():
+            client.get(url)  # прогрев кэшей и индексов
+            if name.startswith('titles-'):
+                # Другие параметры: мимо кэша ответов, но с тем же COUNT.
+                url += '?page=1'
+            with budget(name):
+                response = client.get(url)
+            assert response.status_code == 200, (
+                f'Проверьте, что GET-запрос к `{url}` успешен.'
+            )
+            assert response.get('X-Cache') != 'HIT', (
+                f'Бюджет `{name}` должен измеряться без кэша ответов.'
+            )
+
+    @pytest.mark.parametrize('count', (1, 10))
+    def test_02_users(self, admin_client, data, budget):
+        _, _, author = data
+        with budget('users-list'):
+            admin_client.get('/api/v1/users/')
+        with budget('users-detail'):
+            admin_client.get(f'/api/v1/users/{author.username}/')
+        with budget('users-me'):
+            admin_client.get('/api/v1/users/me/')
+
+    @pytest.mark.parametrize('count', (1,))
+    def test_03_create(self, admin_client, user_client, data, budget):
+        title, review, _ = data
+        with budget('titles-create'):
+            response = admin_client.post('/api/v1/titles/', data={
+                'name': 'Новое', 'year': 2000,
+                'genre': ['genre-0'], 'category': 'films',
+            })
+        assert response.status_code == 201
+        with budget('reviews-create'):
+            response = user_client.post(
+                f'/api/v1/titles/{title.id}/reviews/',
+                data={'text': 'Отзыв', 'score': 7}
+            )
+        assert response.status_code == 201
+        with budget('comments-create'):
+            response = user_client.post(
+                f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/',
+                data={'text': 'Комментарий'}
+            )
+        assert response.status_code == 201
+
+    def test_04_auth(self, client, django_user_model, budget):
+        data = {'username': 'newuser', 'email': 'newuser@yamdb.fake'}
+        with budget('signup'):
+            response = client.post('/api/v1/auth/signup/', data=data)
+        assert response.status_code == 200
+        user = django_user_model.objects.get(username='newuser')
+        with budget('token'):
+            response = client.post('/api/v1/auth/token/', data={
+                'username': 'newuser',
+                'confirmation_code': default_token_generator.make_token(user),
+            })
+        assert response.status_code == 200
+
+    @pytest.mark.parametrize('page_size', (10, 100, 1000))
+    def test_05_review_and_comment_pages(self, client, django_user_model,
+                                         monkeypatch, budget, page_size):
+        monkeypatch.setattr(OptionalCursorPagination, 'page_size', page_size)
+        category = Category.objects.create(name='Фильм', slug='films')
+        title = Title.objects.create(name='Произведение', year=2000,
+                                     category=category)
+        # bulk_create в SQLite не возвращает id, объекты читаются заново.
+        django_user_model.objects.bulk_create(
+            django_user_model(username=f'author{idx}',
+                              email=f'author{idx}@yamdb.fake')
+            for idx in range(page_size)
+        )
+        authors = list(django_user_model.objects.all())
+        Review.objects.bulk_create(
+            Review(title=title, author=author, text='Отзыв', score=5)
+            for author in authors
+        )
+        review = Review.objects.first()
+        Comment.objects.bulk_create(
+            Comment(review=review, author=author, text='Комментарий')
+            for author in authors
+        )
+        urls = {
+            'reviews-list': f'/api/v1/titles/{title.id}/reviews/',
+            'comments-list': (
+                f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+            ),
+        }
+        for name, url in urls.items():
+            client.get(url)
+            with budget(name, ms=1000) as captured:
+                response = client.get(url)
+            assert len(response.json()['results']) == page_size
+            assert not any('email' in query['sql']
+                           for query in captured.captured_queries), (
+                f'Проверьте, что `{url}` загружает у авторов только '
+                'имя пользователя.'
+            )
@@ -0,0 +1,57 @@
+from http import HTTPStatus
+
+import pytest
+
+from api.metrics import registry
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17Performance:
+
+    STATS_URL = '/api/v1/stats/'
+    TITLES_URL = '/api/v1/titles/'
+
+    @pytest.fixture(autouse=True)
+    def reset_registry(self):
+        registry.reset()
+
+    def test_01_server_timing(self, admin_client):
+        create_titles(admin_client)
+        response = admin_client.get(self.TITLES_URL)
+        timing = response.get('Server-Timing', '')
+        metrics = {part.strip().split(';')[0] for part in timing.split(',')}
+        assert {'total', 'db', 'serializer'} <= metrics, (
+            'Проверьте, что ответ содержит заголовок Server-Timing со '
+            'временем запроса, базы данных и сериализаторов.'
+        )
+
+    def test_02_stats(self, admin_client):
+        create_titles(admin_client)
+        for _ in range(3):
+            admin_client.get(self.TITLES_URL)
+        response = admin_client.get(self.STATS_URL)
+        assert response.status_code == HTTPStatus.OK
+        stats = response.json()
+        assert stats['TitleViewSet.list']['count'] == 3, (
+            'Проверьте, что метрики копятся по представлению и действию.'
+        )
+        assert 'TitleViewSet.create' in stats
+        title_list = stats['TitleViewSet.list']
+        assert title_list['queries_mean'] > 0
+        assert title_list['bytes_mean'] > 0
+        assert title_list['serializer_mean_ms'] > 0
+
+        response = admin_client.delete(self.STATS_URL)
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert list(admin_client.get(self.STATS_URL).json()) == [
+            'StatsView.delete'
+        ], 'Проверьте, что DELETE-запрос сбрасывает накопленные метрики.'
+
+    def test_03_stats_for_admin_only(self, client, user_client):
+        assert client.get(self.STATS_URL).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        )
+        assert user_client.get(self.STATS_URL).status_code == (
+            HTTPStatus.FORBIDDEN
+        ), 'Проверьте, что метрики доступны только администратору.'
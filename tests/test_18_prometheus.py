@@ -0,0 +1,122 @@
+import json
+import os
+import threading
+from http import HTTPStatus
+
+import pytest
+
+from api import prometheus
+
+METRICS_URL = '/metrics'
+TITLES_URL = '/api/v1/titles/'
+REQUESTS = 'yamdb_http_requests_total{method="GET",route="title-list",' \
+    'status="200"}'
+METRICS_TOKEN = 'metrics-token'
+
+
+def scrape(client):
+    response = client.get(METRICS_URL,
+                          HTTP_AUTHORIZATION=f'Bearer {METRICS_TOKEN}')
+    assert response.status_code == HTTPStatus.OK
+    assert response['Content-Type'].startswith('text/plain')
+    samples = {}
+    for line in response.content.decode().splitlines():
+        if line and not line.startswith('#'):
+            sample, value = line.rsplit(' ', 1)
+            samples[sample] = float(value)
+    return samples
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18Prometheus:
+
+    @pytest.fixture(autouse=True)
+    def metrics_token(self, settings):
+        settings.METRICS_TOKEN = METRICS_TOKEN
+
+    def test_01_requests_and_histograms(self, client):
+        before = scrape(client).get(REQUESTS, 0)
+        client.get(TITLES_URL)
+        client.get(TITLES_URL)
+        samples = scrape(client)
+        assert samples[REQUESTS] == before + 2, (
+            'Проверьте, что /metrics считает запросы по маршруту, методу '
+            'и коду ответа.'
+        )
+        histogram = 'yamdb_http_request_duration_seconds'
+        labels = 'method="GET",route="title-list"'
+        assert samples[f'{histogram}_bucket{{le="+Inf",{labels}}}'] == (
+            samples[f'{histogram}_count{{{labels}}}']
+        )
+        assert f'yamdb_http_request_db_queries_bucket{{le="0",{labels}}}' in (
+            samples
+        ), 'Проверьте, что гистограмма содержит все границы корзин.'
+        assert 'yamdb_cache_hit_ratio{cache="count"}' in samples
+        assert samples['yamdb_http_requests_in_flight'] >= 1
+        assert samples['yamdb_db_connections_open{alias="default"}'] >= 1, (
+            'Проверьте, что /metrics показывает открытые соединения с базой.'
+        )
+
+    def test_02_other_workers(self, client, settings, tmp_path):
+        settings.METRICS_DIR = str(tmp_path)
+        before = scrape(client).get(REQUESTS, 0)
+        worker = {
+            'counters': [['yamdb_http_requests_total', [
+                ['method', 'GET'], ['route', 'title-list'], ['status', '200']
+            ], 5]],
+            'gauges': [['yamdb_http_requests_in_flight', [], 3]],
+        }
+        # Родительский процесс заведомо жив, завершившийся — нет.
+        with open(tmp_path / f'{os.getppid()}.json', 'w') as file:
+            json.dump(worker, file)
+        in_flight = scrape(client)['yamdb_http_requests_in_flight']
+        with open(tmp_path / f'{2 ** 22 + 1}.json', 'w') as file:
+            json.dump(worker, file)
+        samples = scrape(client)
+        assert samples[REQUESTS] == before + 10, (
+            'Проверьте, что /metrics суммирует счётчики всех воркеров из '
+            'METRICS_DIR, включая завершившиеся.'
+        )
+        assert samples['yamdb_http_requests_in_flight'] == in_flight, (
+            'Проверьте, что датчики завершившихся воркеров не учитываются.'
+        )
+        assert sorted(os.listdir(tmp_path)) == sorted(
+            [f'{os.getppid()}.json', f'{os.getpid()}.json']
+        ), (
+            'Проверьте, что файл завершившегося воркера удаляется, а его '
+            'счётчики переходят в файл текущего процесса.'
+        )
+        assert scrape(client)[REQUESTS] == before + 10
+
+    def test_03_token_required(self, client, settings):
+        response = client.get(METRICS_URL,
+                              HTTP_AUTHORIZATION='Bearer wrong')
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что /metrics без верного токена отвечает 401.'
+        )
+        settings.METRICS_TOKEN = None
+        response = client.get(METRICS_URL,
+                              HTTP_AUTHORIZATION=f'Bearer {METRICS_TOKEN}')
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что без METRICS_TOKEN эндпоинт /metrics отключён.'
+        )
+
+    def test_04_finished_threads_merged(self):
+        labels = {'cache': 'test', 'result': 'hit'}
+        key = ('yamdb_cache_requests_total',
+               prometheus.labels_key(labels))
+        before = prometheus.collect()[0][key]
+        threads = [
+            threading.Thread(target=prometheus.inc, args=(
+                'yamdb_cache_requests_total', labels))
+            for _ in range(20)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert prometheus.collect()[0][key] == before + 20
+        assert not set(threads) & set(prometheus._shards), (
+            'Проверьте, что значения завершившихся потоков сливаются и не '
+            'копятся по одному на поток.'
+        )
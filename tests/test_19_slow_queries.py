@@ -0,0 +1,62 @@
+import json
+import logging
+
+import pytest
+
+from api.slow_queries import JsonFormatter
+from api_yamdb.settings import optional_float
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19SlowQueries:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    @pytest.fixture
+    def log(self, caplog, monkeypatch):
+        logger = logging.getLogger('api.slow_queries')
+        # Файловый обработчик из настроек на время теста не нужен.
+        monkeypatch.setattr(logger, 'handlers', [caplog.handler])
+        return caplog
+
+    def test_01_slow_query_logged(self, admin_client, settings, log):
+        create_titles(admin_client)
+        settings.SLOW_QUERY_THRESHOLD_MS = 0
+        log.clear()
+        admin_client.get(self.TITLES_URL)
+        selects = [record.data for record in log.records
+                   if record.data['sql'].startswith('SELECT')]
+        assert selects, (
+            'Проверьте, что запросы дольше SLOW_QUERY_THRESHOLD_MS '
+            'попадают в журнал.'
+        )
+        entry = selects[-1]
+        assert entry['duration_ms'] >= 0
+        assert entry['plan'], (
+            'Проверьте, что для медленного SELECT сохраняется план '
+            'выполнения.'
+        )
+        assert entry['call_site'].startswith('api/'), (
+            'Проверьте, что в журнал пишется место вызова в коде проекта.'
+        )
+        line = json.loads(JsonFormatter().format(log.records[-1]))
+        assert {'sql', 'params', 'duration_ms', 'plan'} <= set(line)
+
+    def test_02_threshold(self, admin_client, settings, log):
+        settings.SLOW_QUERY_THRESHOLD_MS = 10 ** 6
+        admin_client.get(self.TITLES_URL)
+        settings.SLOW_QUERY_THRESHOLD_MS = None
+        admin_client.get(self.TITLES_URL)
+        assert not log.records, (
+            'Проверьте, что быстрые запросы не попадают в журнал.'
+        )
+
+    def test_03_threshold_from_env(self):
+        assert optional_float('250') == 250
+        for value in (None, '', ' ', 'None', 'none'):
+            assert optional_float(value) is None, (
+                'Проверьте, что пустое значение или `none` в '
+                'SLOW_QUERY_THRESHOLD_MS отключает журнал, а не ломает '
+                'загрузку настроек.'
+            )
@@ -0,0 +1,76 @@
+import pstats
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20Profiling:
+
+    TITLES_URL = '/api/v1/titles/'
+    PROFILE_URL_TEMPLATE = '/api/v1/profiles/{name}/'
+
+    @pytest.fixture(autouse=True)
+    def profile_dir(self, settings, tmp_path):
+        settings.PROFILE_DIR = str(tmp_path)
+        return tmp_path
+
+    def test_01_cprofile(self, admin_client, profile_dir):
+        create_titles(admin_client)
+        response = admin_client.get(self.TITLES_URL, {'profile': 'cprofile'})
+        assert response.status_code == HTTPStatus.OK
+        name = response.get('X-Profile')
+        assert name and name.endswith('.prof'), (
+            'Проверьте, что ответ на запрос администратора с '
+            '`?profile=cprofile` содержит имя файла профиля в X-Profile.'
+        )
+        stats = pstats.Stats(str(profile_dir / name))
+        functions = {function for _, _, function in stats.stats}
+        assert {'list', 'to_representation'} <= functions, (
+            'Проверьте, что профиль охватывает вьюсет и сериализаторы.'
+        )
+        download = admin_client.get(self.PROFILE_URL_TEMPLATE.format(
+            name=name))
+        assert download.status_code == HTTPStatus.OK
+
+    def test_02_sampling(self, admin_client, profile_dir):
+        response = admin_client.get(self.TITLES_URL,
+                                    HTTP_X_PROFILE='sample')
+        name = response.get('X-Profile')
+        assert name and name.endswith('.collapsed'), (
+            'Проверьте, что заголовок `X-Profile: sample` включает '
+            'семплирующий профилировщик.'
+        )
+        for line in (profile_dir / name).read_text().splitlines():
+            stack, count = line.rsplit(' ', 1)
+            assert int(count) > 0 and stack
+
+    def test_03_admin_only(self, client, user_client, profile_dir):
+        for api_client in (client, user_client):
+            response = api_client.get(self.TITLES_URL,
+                                      {'profile': 'cprofile'})
+            assert response.status_code == HTTPStatus.OK
+            assert 'X-Profile' not in response, (
+                'Проверьте, что профилирование доступно только '
+                'администратору.'
+            )
+        assert not list(profile_dir.iterdir())
+        assert user_client.get(self.PROFILE_URL_TEMPLATE.format(
+            name='missing.prof')).status_code == HTTPStatus.FORBIDDEN
+
+    def test_04_old_profiles_removed(self, admin_client, settings,
+                                     profile_dir):
+        settings.PROFILE_MAX_FILES = 2
+        names = [
+            admin_client.get(self.TITLES_URL,
+                             {'profile': 'cprofile'})['X-Profile']
+            for _ in range(4)
+        ]
+        assert sorted(path.name for path in profile_dir.iterdir()) == (
+            sorted(names[-2:])
+        ), (
+            'Проверьте, что хранятся только PROFILE_MAX_FILES последних '
+            'профилей.'
+        )
@@ -0,0 +1,149 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import transaction
+
+from api import prometheus
+from reviews.models import Category, Genre, Review, Title
+
+
+def response_cache_hits():
+    counters, _ = prometheus.collect()
+    return counters['yamdb_cache_requests_total',
+                    (('cache', 'response'), ('result', 'hit'))]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21ResponseCache:
+
+    TITLES_URL = '/api/v1/titles/'
+    TITLE_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+
+    @pytest.fixture
+    def titles(self):
+        category = Category.objects.create(name='Фильм', slug='films')
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        titles = []
+        for name in ('Первое', 'Второе'):
+            title = Title.objects.create(name=name, year=2000,
+                                         category=category)
+            title.genre.set([genre])
+            titles.append(title)
+        return titles
+
+    def detail(self, client, title):
+        return client.get(
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=title.id))
+
+    def test_01_hit(self, client, titles, django_assert_num_queries):
+        hits = response_cache_hits()
+        response = client.get(f'{self.TITLES_URL}?year=2000&ordering=name')
+        assert response['X-Cache'] == 'MISS'
+        with django_assert_num_queries(0):
+            response = client.get(
+                f'{self.TITLES_URL}?ordering=name&year=2000')
+        assert response['X-Cache'] == 'HIT', (
+            'Проверьте, что повторный запрос с теми же параметрами в другом '
+            'порядке берётся из кэша.'
+        )
+        assert response.json()['count'] == 2
+        assert response_cache_hits() == hits + 1, (
+            'Проверьте, что попадания в кэш ответов учитываются в метриках.'
+        )
+
+    def test_02_review_invalidates(self, client, user, titles):
+        first, second = titles
+        client.get(self.TITLES_URL)
+        self.detail(client, first)
+        self.detail(client, second)
+        Review.objects.create(title=first, author=user, text='Отзыв',
+                              score=8)
+        response = self.detail(client, first)
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['rating'] == 8, (
+            'Проверьте, что новый отзыв сбрасывает кэш ответа произведения.'
+        )
+        assert self.detail(client, second)['X-Cache'] == 'HIT', (
+            'Проверьте, что отзыв не сбрасывает кэш других произведений.'
+        )
+        results = client.get(self.TITLES_URL).json()['results']
+        assert {item['name']: item['rating'] for item in results} == {
+            'Первое': 8, 'Второе': None
+        }, 'Проверьте, что новый отзыв сбрасывает кэш списка произведений.'
+
+    def test_03_genre_and_category_invalidate(self, client, titles):
+        first, second = titles
+        self.detail(client, first)
+        Genre.objects.get(slug='drama').delete()
+        assert self.detail(client, first).json()['genre'] == [], (
+            'Проверьте, что удаление жанра сбрасывает кэш ответов.'
+        )
+        category = Category.objects.get(slug='films')
+        category.name = 'Кино'
+        category.save()
+        assert self.detail(client, first).json()['category']['name'] == (
+            'Кино'
+        ), 'Проверьте, что изменение категории сбрасывает кэш ответов.'
+
+    def test_04_genre_set_invalidates(self, client, titles):
+        first, second = titles
+        comedy = Genre.objects.create(name='Комедия', slug='comedy')
+        self.detail(client, first)
+        self.detail(client, second)
+        comedy.titles.add(second)
+        assert self.detail(client, first)['X-Cache'] == 'HIT', (
+            'Проверьте, что изменение жанров произведения не сбрасывает '
+            'кэш других произведений.'
+        )
+        genres = [item['slug']
+                  for item in self.detail(client, second).json()['genre']]
+        assert sorted(genres) == ['comedy', 'drama'], (
+            'Проверьте, что изменение жанров произведения сбрасывает кэш '
+            'его ответа.'
+        )
+
+    def test_05_reset_on_commit(self, client, titles):
+        first, _ = titles
+        self.detail(client, first)
+        with transaction.atomic():
+            first.name = 'Откаченное'
+            first.save()
+            transaction.set_rollback(True)
+        response = self.detail(client, first)
+        assert response['X-Cache'] == 'HIT', (
+            'Проверьте, что откаченное изменение не сбрасывает кэш ответов.'
+        )
+        with transaction.atomic():
+            first.name = 'Новое'
+            first.save()
+            assert self.detail(client, first)['X-Cache'] == 'HIT', (
+                'Проверьте, что кэш ответов сбрасывается только после '
+                'фиксации транзакции.'
+            )
+        assert self.detail(client, first).json()['name'] == 'Новое'
+
+    def test_06_bulk_changes_invalidate(self, client, titles):
+        first, _ = titles
+        self.detail(client, first)
+        Title.objects.filter(pk=first.pk).update(rating_sum=5,
+                                                 rating_count=1)
+        assert self.detail(client, first)['X-Cache'] == 'HIT'
+        call_command('rebuild_ratings', stdout=StringIO())
+        response = self.detail(client, first)
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что rebuild_ratings сбрасывает кэш ответов.'
+        )
+
+    def test_07_host_in_key(self, client):
+        category = Category.objects.create(name='Фильм', slug='films')
+        for idx in range(11):
+            Title.objects.create(name=f'Произведение {idx}', year=2000,
+                                 category=category)
+        client.get(self.TITLES_URL, HTTP_HOST='evil.example')
+        response = client.get(self.TITLES_URL)
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что ответы для разных хостов кэшируются отдельно: '
+            'ссылки пагинации в них абсолютные.'
+        )
+        assert 'evil.example' not in response.json()['next']
@@ -0,0 +1,165 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import transaction
+
+from reviews.models import Category, Comment, Review, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22ConditionalGet:
+
+    TITLES_URL = '/api/v1/titles/'
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    COMMENTS_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+    )
+
+    @pytest.fixture
+    def review(self, user):
+        category = Category.objects.create(name='Фильм', slug='films')
+        title = Title.objects.create(name='Первое', year=2000,
+                                     category=category)
+        return Review.objects.create(title=title, author=user, text='Отзыв',
+                                     score=8)
+
+    def test_01_etag_not_modified(self, client, review,
+                                  django_assert_num_queries):
+        urls = (
+            self.TITLES_URL,
+            f'{self.TITLES_URL}{review.title_id}/',
+            self.REVIEWS_URL_TEMPLATE.format(title_id=review.title_id),
+            self.COMMENTS_URL_TEMPLATE.format(title_id=review.title_id,
+                                              review_id=review.id),
+            '/api/v1/categories/',
+            '/api/v1/genres/',
+        )
+        for url in urls:
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.OK
+            assert response.has_header('ETag') and response.has_header(
+                'Last-Modified'
+            ), (
+                f'Проверьте, что ответ на GET `{url}` содержит ETag и '
+                'Last-Modified.'
+            )
+            with django_assert_num_queries(0):
+                repeated = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            assert repeated.status_code == HTTPStatus.NOT_MODIFIED, (
+                f'Проверьте, что GET `{url}` с совпадающим If-None-Match '
+                'возвращает 304 без запросов к базе.'
+            )
+            assert repeated['ETag'] == response['ETag']
+            repeated = client.get(
+                url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+            )
+            assert repeated.status_code == HTTPStatus.NOT_MODIFIED, (
+                f'Проверьте, что GET `{url}` с If-Modified-Since '
+                'возвращает 304.'
+            )
+
+    def test_02_changes_invalidate(self, client, user, review):
+        title_url = f'{self.TITLES_URL}{review.title_id}/'
+        reviews_url = self.REVIEWS_URL_TEMPLATE.format(
+            title_id=review.title_id)
+        comments_url = self.COMMENTS_URL_TEMPLATE.format(
+            title_id=review.title_id, review_id=review.id)
+        etags = {url: client.get(url)['ETag']
+                 for url in (title_url, reviews_url, comments_url)}
+
+        Comment.objects.create(review=review, author=user, text='Коммент')
+        assert client.get(
+            title_url, HTTP_IF_NONE_MATCH=etags[title_url]
+        ).status_code == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что комментарий не сбрасывает ETag произведения.'
+        )
+        response = client.get(comments_url,
+                              HTTP_IF_NONE_MATCH=etags[comments_url])
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что новый комментарий меняет ETag списка '
+            'комментариев.'
+        )
+        assert response.json()['count'] == 1
+
+        review.text = 'Исправленный отзыв'
+        review.save()
+        for url in (title_url, reviews_url):
+            assert client.get(
+                url, HTTP_IF_NONE_MATCH=etags[url]
+            ).status_code == HTTPStatus.OK, (
+                f'Проверьте, что изменение отзыва меняет ETag `{url}`.'
+            )
+
+    def test_03_etag_depends_on_user(self, user_client, moderator_client):
+        url = '/api/v1/users/me/'
+        etag = user_client.get(url)['ETag']
+        response = moderator_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что ETag ответа `users/me` зависит от пользователя.'
+        )
+        assert user_client.get(
+            url, HTTP_IF_NONE_MATCH=etag
+        ).status_code == HTTPStatus.NOT_MODIFIED
+        user_client.patch(url, data={'bio': 'Новое описание'})
+        assert user_client.get(
+            url, HTTP_IF_NONE_MATCH=etag
+        ).status_code == HTTPStatus.OK, (
+            'Проверьте, что изменение профиля меняет ETag `users/me`.'
+        )
+
+    def test_04_authors_invalidate(self, client, user, review,
+                                   django_user_model):
+        reviews_url = self.REVIEWS_URL_TEMPLATE.format(
+            title_id=review.title_id)
+        comments_url = self.COMMENTS_URL_TEMPLATE.format(
+            title_id=review.title_id, review_id=review.id)
+        Comment.objects.create(review=review, author=user, text='Коммент')
+        etags = {url: client.get(url)['ETag']
+                 for url in (reviews_url, comments_url)}
+
+        django_user_model.objects.create_user(
+            username='newcomer', email='newcomer@yamdb.fake')
+        user.bio = 'Новое описание'
+        user.save()
+        for url, etag in etags.items():
+            assert client.get(
+                url, HTTP_IF_NONE_MATCH=etag
+            ).status_code == HTTPStatus.NOT_MODIFIED, (
+                f'Проверьте, что регистрация пользователей и правка профиля '
+                f'не сбрасывают ETag `{url}`.'
+            )
+
+        user.username = 'renamed'
+        user.save()
+        for url, etag in etags.items():
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что смена имени автора меняет ETag `{url}`.'
+            )
+            assert response.json()['results'][0]['author'] == 'renamed'
+
+    def test_05_changes_apply_on_commit(self, client, user, review):
+        comments_url = self.COMMENTS_URL_TEMPLATE.format(
+            title_id=review.title_id, review_id=review.id)
+        etag = client.get(comments_url)['ETag']
+        with transaction.atomic():
+            Comment.objects.create(review=review, author=user,
+                                   text='Откаченный')
+            transaction.set_rollback(True)
+        assert client.get(
+            comments_url, HTTP_IF_NONE_MATCH=etag
+        ).status_code == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что откаченный комментарий не меняет ETag списка.'
+        )
+        with transaction.atomic():
+            Comment.objects.create(review=review, author=user,
+                                   text='Коммент')
+            assert client.get(
+                comments_url, HTTP_IF_NONE_MATCH=etag
+            ).status_code == HTTPStatus.NOT_MODIFIED, (
+                'Проверьте, что ETag меняется только после фиксации '
+                'транзакции.'
+            )
+        assert client.get(
+            comments_url, HTTP_IF_NONE_MATCH=etag
+        ).status_code == HTTPStatus.OK
@@ -0,0 +1,66 @@
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from threading import Barrier
+
+import pytest
+from django.db import connection
+from rest_framework.test import APIClient
+
+from reviews.models import Category, Review, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23DuplicateReview:
+
+    THREADS = 8
+
+    @pytest.fixture
+    def reviews_url(self):
+        category = Category.objects.create(name='Фильм', slug='films')
+        title = Title.objects.create(name='Произведение', year=2000,
+                                     category=category)
+        return f'/api/v1/titles/{title.id}/reviews/'
+
+    def test_01_duplicate(self, user_client, reviews_url, budget):
+        data = {'text': 'Отзыв', 'score': 7}
+        assert user_client.post(reviews_url, data=data).status_code == (
+            HTTPStatus.CREATED
+        )
+        with budget('reviews-create'):
+            response = user_client.post(reviews_url, data=data)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert response.json() == {'non_field_errors': [
+            'Вы уже оставили отзыв на это произведение.'
+        ]}, (
+            'Проверьте, что повторный отзыв отклоняется с прежним '
+            'сообщением об ошибке.'
+        )
+
+    def test_02_parallel_duplicates(self, token_user, reviews_url):
+        barrier = Barrier(self.THREADS)
+
+        def post(_):
+            client = APIClient()
+            client.credentials(
+                HTTP_AUTHORIZATION=f'Bearer {token_user["access"]}'
+            )
+            barrier.wait()
+            try:
+                return client.post(
+                    reviews_url, data={'text': 'Отзыв', 'score': 7}
+                ).status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(self.THREADS) as executor:
+            statuses = list(executor.map(post, range(self.THREADS)))
+
+        assert sorted(statuses) == (
+            [HTTPStatus.CREATED] + [HTTPStatus.BAD_REQUEST] * (
+                self.THREADS - 1)
+        ), (
+            'Проверьте, что из параллельных одинаковых запросов создаётся '
+            'ровно один отзыв, а остальные получают ответ 400.'
+        )
+        assert Review.objects.count() == 1
+        assert Title.objects.get().rating == 7
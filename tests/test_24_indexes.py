@@ -0,0 +1,62 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Category, Comment, Review, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24Indexes:
+    """Списки отзывов, комментариев и произведений читаются по индексу."""
+
+    TITLES_URL = '/api/v1/titles/'
+
+    @pytest.fixture(autouse=True)
+    def sqlite_only(self):
+        if connection.vendor != 'sqlite':
+            pytest.skip('Проверяется план запроса SQLite.')
+
+    @pytest.fixture
+    def review(self, user):
+        category = Category.objects.create(name='Фильм', slug='films')
+        title = Title.objects.create(name='Произведение', year=2000,
+                                     category=category)
+        review = Review.objects.create(title=title, author=user,
+                                       text='Отзыв', score=5)
+        Comment.objects.create(review=review, author=user, text='Коммент')
+        return review
+
+    def sorted_selects(self, client, url, table):
+        """Запросы страницы списка: выборка из table с сортировкой."""
+        with CaptureQueriesContext(connection) as captured:
+            response = client.get(url)
+        assert response.status_code == 200
+        return [query['sql'] for query in captured.captured_queries
+                if query['sql'].startswith('SELECT')
+                and f'FROM "{table}"' in query['sql']
+                and 'ORDER BY' in query['sql']]
+
+    def query_plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+
+    def test_01_no_temp_sort(self, client, review):
+        reviews_url = f'{self.TITLES_URL}{review.title_id}/reviews/'
+        comments_url = f'{reviews_url}{review.id}/comments/'
+        urls = {
+            reviews_url: 'reviews_review',
+            f'{reviews_url}?cursor=': 'reviews_review',
+            comments_url: 'reviews_comment',
+            f'{comments_url}?cursor=': 'reviews_comment',
+            f'{self.TITLES_URL}?category=films': 'reviews_title',
+        }
+        for url, table in urls.items():
+            selects = self.sorted_selects(client, url, table)
+            assert selects, f'Не найден запрос списка для `{url}`.'
+            for sql in selects:
+                plan = self.query_plan(sql)
+                assert not any('TEMP B-TREE' in step for step in plan), (
+                    f'Проверьте, что список `{url}` читается по составному '
+                    f'индексу без отдельной сортировки. План: {plan}'
+                )
@@ -0,0 +1,129 @@
+from http import HTTPStatus
+
+import pytest
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25StatelessJwt:
+
+    STATS_URL = '/api/v1/stats/'
+    ME_URL = '/api/v1/users/me/'
+
+    def token_client(self, client, user):
+        response = client.post('/api/v1/auth/token/', data={
+            'username': user.username,
+            'confirmation_code': default_token_generator.make_token(user),
+        })
+        assert response.status_code == HTTPStatus.OK
+        api_client = APIClient()
+        api_client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {response.json()["token"]}'
+        )
+        api_client.token = AccessToken(response.json()['token'])
+        return api_client
+
+    def test_01_no_user_query(self, client, admin, django_assert_num_queries):
+        admin_client = self.token_client(client, admin)
+        with django_assert_num_queries(0):
+            response = admin_client.get(self.STATS_URL)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что права администратора берутся из токена, '
+            'выданного `/api/v1/auth/token/`, без запроса к базе.'
+        )
+        with django_assert_num_queries(1):
+            response = admin_client.get(self.ME_URL)
+        assert response.json()['email'] == admin.email, (
+            'Проверьте, что `users/me` догружает профиль одним запросом.'
+        )
+
+    def test_02_role_change_revokes(self, client, admin,
+                                    django_assert_num_queries):
+        admin_client = self.token_client(client, admin)
+        admin.bio = 'Новое описание'
+        admin.save()
+        with django_assert_num_queries(0):
+            assert admin_client.get(self.STATS_URL).status_code == (
+                HTTPStatus.OK
+            ), 'Проверьте, что изменение профиля не отзывает токен.'
+        admin.role = 'user'
+        admin.save()
+        assert admin_client.get(self.STATS_URL).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), 'Проверьте, что смена роли отзывает выданные токены.'
+
+    def test_03_lost_version_falls_back_to_db(self, client, user):
+        user_client = self.token_client(client, user)
+        caches[settings.VERSION_CACHE_ALIAS].clear()
+        response = user_client.get(self.ME_URL)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что при потере версии в кэше токен проверяется '
+            'по базе и остаётся действительным.'
+        )
+        user.delete()
+        assert user_client.get(self.ME_URL).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), 'Проверьте, что удаление пользователя отзывает его токены.'
+
+    def test_04_version_stored_in_db(self, client, admin):
+        admin_client = self.token_client(client, admin)
+        admin.refresh_from_db()
+        assert admin_client.token['ver'] == admin.token_version, (
+            'Проверьте, что токен несёт версию прав из поля '
+            '`token_version` пользователя.'
+        )
+        admin.role = 'user'
+        admin.save()
+        admin.refresh_from_db()
+        assert admin.token_version == admin_client.token['ver'] + 1
+        # Процесс, не получивший новую версию, читает её из базы.
+        caches[settings.VERSION_CACHE_ALIAS].clear()
+        assert admin_client.get(self.STATS_URL).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), 'Проверьте, что отзыв токена не зависит от кэша версий.'
+
+    def test_05_queryset_update_revokes(self, client, admin):
+        admin_client = self.token_client(client, admin)
+        user_model = type(admin)
+        user_model.objects.filter(pk=admin.pk).update(bio='Новое описание')
+        assert admin_client.get(self.STATS_URL).status_code == (
+            HTTPStatus.OK
+        ), 'Проверьте, что изменение профиля не отзывает токен.'
+        with transaction.atomic():
+            user_model.objects.filter(pk=admin.pk).update(role='user')
+            transaction.set_rollback(True)
+        assert admin_client.get(self.STATS_URL).status_code == (
+            HTTPStatus.OK
+        ), 'Проверьте, что откат смены роли не отзывает токен.'
+        user_model.objects.filter(pk=admin.pk).update(role='user')
+        assert admin_client.get(self.STATS_URL).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), (
+            'Проверьте, что смена роли через `QuerySet.update()` отзывает '
+            'выданные токены.'
+        )
+
+    def test_06_update_filtered_by_changed_field(self, client, admin):
+        admin_client = self.token_client(client, admin)
+        type(admin).objects.filter(role='admin').update(role='user')
+        assert admin_client.get(self.STATS_URL).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), (
+            'Проверьте, что `QuerySet.update()` с фильтром по изменяемому '
+            'полю отзывает выданные токены.'
+        )
+
+    def test_07_inactive_user_rejected(self, client, admin):
+        admin.is_active = False
+        admin.save()
+        admin_client = self.token_client(client, admin)
+        response = admin_client.get(self.STATS_URL)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что токен неактивного пользователя отклоняется.'
+        )
+        assert response.json()['code'] == 'user_inactive'
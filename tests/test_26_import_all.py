@@ -0,0 +1,217 @@
+import csv
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connections
+
+from reviews.management.commands import import_all as command
+from reviews.models import Comment, Review, Title
+
+PUB_DATE = '2020-01-13T23:20:02.422Z'
+IMPORT_SHARD = command.import_shard
+# Первая задача процесса пула: соединения проверяются до неё.
+worker_started = False
+
+# Строки со ссылками на несуществующие записи (99) должны пропускаться.
+CSV_FILES = {
+    'category.csv': (
+        ('id', 'name', 'slug'),
+        (1, 'Фильм', 'movie'),
+    ),
+    'genre.csv': (
+        ('id', 'name', 'slug'),
+        (1, 'Драма', 'drama'),
+    ),
+    'users.csv': (
+        ('id', 'username', 'email', 'role', 'bio', 'first_name',
+         'last_name'),
+        (1, 'reader', 'reader@yamdb.fake', 'user', '', '', ''),
+        (2, 'critic', 'critic@yamdb.fake', 'user', '', '', ''),
+    ),
+    'titles.csv': (
+        ('id', 'name', 'year', 'category'),
+        (1, 'Побег из Шоушенка', 1994, 1),
+        (2, 'Крёстный отец', 1972, 1),
+        (3, 'Без категории', 2000, 99),
+    ),
+    'genre_title.csv': (
+        ('id', 'title_id', 'genre_id'),
+        (1, 1, 1),
+        (2, 2, 1),
+        (3, 3, 1),
+        (4, 1, 99),
+    ),
+    'review.csv': (
+        ('id', 'title_id', 'text', 'author', 'score', 'pub_date'),
+        (1, 1, 'Отзыв', 1, 10, PUB_DATE),
+        (2, 2, 'Отзыв', 2, 6, PUB_DATE),
+        (3, 3, 'Нет произведения', 1, 5, PUB_DATE),
+        (4, 1, 'Нет автора', 99, 5, PUB_DATE),
+    ),
+    'comments.csv': (
+        ('id', 'review_id', 'text', 'author', 'pub_date'),
+        (1, 1, 'Комментарий', 2, PUB_DATE),
+        (2, 3, 'Нет отзыва', 2, PUB_DATE),
+        (3, 2, 'Нет автора', 99, PUB_DATE),
+    ),
+}
+TABLES = ('categories', 'genres', 'users', 'titles', 'genre_title',
+          'reviews', 'comments')
+
+
+def write_csv(path, files=CSV_FILES):
+    for file_name, (header, *rows) in files.items():
+        with open(path / file_name, 'w', encoding='utf-8',
+                  newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(header)
+            writer.writerows(rows)
+    return path
+
+
+def import_all(path, **options):
+    stdout = StringIO()
+    options.setdefault('only', TABLES)
+    call_command('import_all', path=path, stdout=stdout, **options)
+    return stdout.getvalue()
+
+
+def import_shard_without_connection(*args):
+    """import_shard, проверяющий, что процесс не унаследовал соединений."""
+    global worker_started
+    if not worker_started:
+        assert all(conn.connection is None for conn in connections.all()), (
+            'Проверьте, что процессы импорта не наследуют открытые '
+            'соединения с базой.'
+        )
+        worker_started = True
+    return IMPORT_SHARD(*args)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26ImportAll:
+
+    def test_01_orphans_skipped(self, tmp_path):
+        output = import_all(write_csv(tmp_path), batch_size=2)
+        assert sorted(Title.objects.values_list('id', flat=True)) == [1, 2]
+        assert sorted(Review.objects.values_list('id', flat=True)) == [1, 2]
+        assert list(Comment.objects.values_list('id', flat=True)) == [1], (
+            'Проверьте, что import_all пропускает строки со ссылками на '
+            'несуществующие записи.'
+        )
+        for label, skipped in (('произведений', 1), ('отзывов', 2),
+                               ('комментариев', 2)):
+            line = next(line for line in output.splitlines()
+                        if line.startswith(f'Импорт {label} '))
+            assert f'Пропущено без связанных объектов: {skipped}.' in line, (
+                f'Проверьте, что импорт {label} сообщает число пропущенных '
+                f'строк: {line}'
+            )
+
+    def test_02_genre_title(self, tmp_path):
+        write_csv(tmp_path)
+        output = import_all(tmp_path, only=['categories', 'genres',
+                                            'titles', 'genre_title'])
+        assert sorted(
+            Title.genre.through.objects.values_list('title_id', 'genre_id')
+        ) == [(1, 1), (2, 1)], (
+            'Проверьте, что import_all загружает связи из genre_title.csv '
+            'и пропускает связи с несуществующими произведениями и жанрами.'
+        )
+        assert list(Title.objects.get(id=1).genre.values_list(
+            'slug', flat=True)) == ['drama']
+        assert 'Пропущено без связанных объектов: 2.' in next(
+            line for line in output.splitlines()
+            if line.startswith('Импорт жанров произведений ')
+        )
+        assert not Review.objects.exists(), (
+            'Проверьте, что --only загружает только указанные таблицы.'
+        )
+
+    def test_03_resume_after_crash(self, tmp_path, monkeypatch):
+        write_csv(tmp_path)
+        checkpoint = tmp_path / 'import.json'
+        reviews = command.TABLES['reviews']
+
+        def crash_on_third_review(row):
+            if row['id'] == '3':
+                raise RuntimeError('Сбой импорта')
+            return reviews.build(row)
+
+        monkeypatch.setitem(command.TABLES, 'reviews', reviews._replace(
+            build=crash_on_third_review))
+        with pytest.raises(RuntimeError):
+            import_all(tmp_path, batch_size=1, checkpoint=str(checkpoint))
+        assert Review.objects.count() == 2
+        assert json.loads(checkpoint.read_text())['review.csv']['rows'] == 2
+
+        monkeypatch.setitem(command.TABLES, 'reviews', reviews)
+        output = import_all(tmp_path, batch_size=1,
+                            checkpoint=str(checkpoint))
+        assert 'Импорт произведений уже выполнен.' in output
+        assert 'Импорт отзывов завершён: 0 строк' in output, (
+            'Проверьте, что после сбоя импорт отзывов продолжается с '
+            'сохранённого смещения, а не с начала файла.'
+        )
+        assert sorted(Review.objects.values_list('id', flat=True)) == [
+            1, 2
+        ], (
+            'Проверьте, что повторный запуск с --checkpoint продолжает '
+            'импорт с места сбоя без дублей и пропусков.'
+        )
+        assert list(Comment.objects.values_list('id', flat=True)) == [1]
+        assert Title.objects.get(id=1).rating == 10
+        assert not checkpoint.exists(), (
+            'Проверьте, что файл прогресса удаляется после успешного импорта.'
+        )
+
+    def test_04_report_zero_elapsed(self):
+        stdout = StringIO()
+        import_command = command.Command(stdout=stdout)
+        import_command.report(command.TABLES['titles'], 0, 0, 0)
+        assert '(0 строк/с)' in stdout.getvalue()
+
+    def test_05_workers(self, tmp_path):
+        output = import_all(write_csv(tmp_path), batch_size=1, workers=2)
+        assert 'Проверка целостности пройдена.' in output
+        assert sorted(Review.objects.values_list('id', flat=True)) == [
+            1, 2
+        ], (
+            'Проверьте, что импорт с --workers загружает те же строки, что '
+            'и импорт в один процесс.'
+        )
+        assert list(Comment.objects.values_list('id', flat=True)) == [1]
+        assert sorted(
+            Title.genre.through.objects.values_list('title_id', 'genre_id')
+        ) == [(1, 1), (2, 1)]
+        assert Title.objects.get(id=2).rating == 6
+
+    def test_06_invalid_options(self, tmp_path):
+        write_csv(tmp_path)
+        with pytest.raises(CommandError, match='Неизвестные таблицы: '
+                                               'ratings'):
+            import_all(tmp_path, only=['titles', 'ratings'])
+        with pytest.raises(CommandError, match='--workers и --checkpoint'):
+            import_all(tmp_path, workers=2,
+                       checkpoint=str(tmp_path / 'import.json'))
+
+    def test_07_consistency_counts_database_rows(self, tmp_path):
+        files = dict(CSV_FILES)
+        files['genre.csv'] = CSV_FILES['genre.csv'] + (
+            (1, 'Драма', 'drama'),
+        )
+        write_csv(tmp_path, files)
+        with pytest.raises(CommandError, match=(
+            'genre.csv: загружено 2 строк, в базе добавилось 1.'
+        )):
+            import_all(tmp_path, workers=2, only=['genres'])
+
+    def test_08_workers_start_without_connections(self, tmp_path,
+                                                  monkeypatch):
+        monkeypatch.setattr(command, 'import_shard',
+                            import_shard_without_connection)
+        output = import_all(write_csv(tmp_path), batch_size=1, workers=2)
+        assert 'Проверка целостности пройдена.' in output